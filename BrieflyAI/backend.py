@@ -1,13 +1,100 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+import asyncio
+import logging
+import os
+import time
+import orjson
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime
 from models import NewsRequest
-from services.news_scraper import NewsScraper
-from services.reddit_scraper import scrape_reddit_topics
-from utils.summarization import generate_structured_news_summary, summarize_with_groq_structured
-from config import GROQ_API_KEY
+from services.pipeline import run_summary_pipeline, build_topic_sections
+from services.jobs import JobManager
+from services.prewarm import prewarmer
+from utils.archive import archive
+from utils.cache import llm_cache, track_llm_cache_usage
+from utils.deadline import deadline_scope
+from utils.singleflight import singleflight
+from utils.events import emit_event, run_with_events
+from utils.logging_config import configure_logging
+from utils.metrics import REQUEST_LATENCY
+from utils.warmup import warm_up
+from config import COMPRESSION_MINIMUM_SIZE, PREWARM_ENABLED, WORKERS, REQUEST_DEADLINE_SECONDS, WARMUP
+from prometheus_client import generate_latest, CollectorRegistry, CONTENT_TYPE_LATEST, multiprocess
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse serialized with orjson"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+# Jobs exist for runs longer than a client will wait, so they only get a deadline when asked for one
+job_manager = JobManager(lambda request: run_summary(NewsRequest(**request), default_deadline=None))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup = None
+    if WARMUP == "startup":
+        await asyncio.to_thread(warm_up)
+    elif WARMUP == "background":
+        # /health answers right away; the first requests may still wait on modules being loaded
+        warmup = asyncio.create_task(asyncio.to_thread(warm_up))
+    await job_manager.start()
+    if PREWARM_ENABLED:
+        prewarmer.start()
+    yield
+    await prewarmer.stop()
+    await job_manager.stop()
+    await archive.drain()
+    if warmup is not None:
+        await asyncio.gather(warmup, return_exceptions=True)
+
+
+app = FastAPI(
+    title="NewsNinja API",
+    description="News and Reddit Analysis API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+# Brotli when available (it falls back to gzip for clients without br), otherwise gzip
+if BrotliMiddleware is not None:
+    app.add_middleware(
+        BrotliMiddleware,
+        minimum_size=COMPRESSION_MINIMUM_SIZE,
+        excluded_handlers=["/generate-news-summary/stream"]
+    )
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so /jobs/{job_id} stays one series
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUEST_LATENCY.labels(request.method, endpoint, str(status)).observe(time.perf_counter() - start)
 
-app = FastAPI(title="NewsNinja API", description="News and Reddit Analysis API")
 
 @app.get("/")
 async def root():
@@ -19,161 +106,274 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 
+@app.get("/cache-stats")
+async def cache_stats():
+    return {
+        "llm_cache": llm_cache.stats,
+        "singleflight": singleflight.stats,
+        "prewarm": {**prewarmer.stats, "hit_rate": round(prewarmer.hit_rate, 3)}
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: request and stage latency, Groq tokens, retries, rate-limit waits"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Aggregate every worker process, not just the one serving this request
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+SUMMARY_RESPONSE_FIELDS = ["topics", "source_type", "timestamp", "summary", "individual_topics", "metadata", "raw_data"]
+
+
+def build_summary_response(request: NewsRequest, pipeline: dict, llm_cache_usage: dict) -> dict:
+    """Assemble the /generate-news-summary payload from pipeline output"""
+    news_data = pipeline["news"]
+    reddit_data = pipeline["reddit"]
+
+    # Check if we have any data to work with
+    if not news_data and not reddit_data:
+        raise HTTPException(
+            status_code=404, 
+            detail="No data could be retrieved for the specified topics and sources"
+        )
+
+    # Per-topic sections reuse the map results instead of new LLM calls
+    individual_analyses = build_topic_sections(request.topics, news_data, reddit_data)
+
+    # Prepare response data
+    response_data = {
+        "topics": request.topics,
+        "source_type": request.source_type,
+        "timestamp": datetime.now().isoformat(),
+        "summary": pipeline["summary"],
+        "individual_topics": individual_analyses,
+        "metadata": {
+            "total_topics": len(request.topics),
+            "sources_used": request.source_type,
+            "has_news_data": bool(news_data),
+            "has_reddit_data": bool(reddit_data),
+            "analysis_generated": True,
+            "cache": {
+                "news": news_data.get("cache", {}),
+                "reddit": reddit_data.get("cache", {})
+            },
+            "llm_cache": llm_cache_usage,
+            "dedup": news_data.get("dedup", {}),
+            "digest": news_data.get("digest", {}),
+            "topic_status": pipeline["status"],
+            "deadline": pipeline["deadline"],
+            "prompt": pipeline["prompt"],
+            "pipeline": {
+                **pipeline["timings"],
+                "llm_calls": llm_cache_usage["misses"] - llm_cache_usage["coalesced"]
+            }
+        }
+    }
+
+    # raw_data repeats the analyses above, so it is opt-in
+    if request.include_raw_data:
+        response_data["raw_data"] = {}
+        if request.source_type in ["news", "both"]:
+            response_data["raw_data"]["news"] = news_data
+        if request.source_type in ["reddit", "both"]:
+            response_data["raw_data"]["reddit"] = reddit_data
+
+    if request.fields:
+        response_data = {field: response_data[field] for field in request.fields if field in response_data}
+    return response_data
+
+
+def validate_fields(request: NewsRequest):
+    unknown = set(request.fields or []) - set(SUMMARY_RESPONSE_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(SUMMARY_RESPONSE_FIELDS)}"
+        )
+
+
+async def run_summary(request: NewsRequest, default_deadline: Optional[float] = REQUEST_DEADLINE_SECONDS) -> dict:
+    """Map each (topic, source) to an analysis, then reduce into one report"""
+    validate_fields(request)
+    llm_cache_usage = track_llm_cache_usage()
+    with deadline_scope(request.deadline_seconds or default_deadline):
+        pipeline = await run_summary_pipeline(request.topics, request.source_type, request.incremental)
+    return build_summary_response(request, pipeline, llm_cache_usage)
+
+
 @app.post("/generate-news-summary")
 async def generate_news_summary(request: NewsRequest):
     """
     Generate a comprehensive structured news summary for UI display
     """
     try:
-        # Initialize results storage
-        results = {}
-        raw_data = {}
-        
-        # Scrape news sources if requested
-        if request.source_type in ["news", "both"]:
-            try:
-                news_scraper = NewsScraper()
-                news_results = await news_scraper.scrape_news(request.topics)
-                results["news"] = news_results
-                raw_data["news"] = news_results
-            except Exception as e:
-                print(f"News scraping error: {e}")
-                results["news"] = {}
-
-        # Scrape Reddit sources if requested
-        if request.source_type in ["reddit", "both"]:
-            try:
-                reddit_results = await scrape_reddit_topics(request.topics)
-                results["reddit"] = reddit_results
-                raw_data["reddit"] = reddit_results
-            except Exception as e:
-                print(f"Reddit scraping error: {e}")
-                results["reddit"] = {}
-
-        # Check if we have any data to work with
-        news_data = results.get("news", {})
-        reddit_data = results.get("reddit", {})
-        
-        if not news_data and not reddit_data:
-            raise HTTPException(
-                status_code=404, 
-                detail="No data could be retrieved for the specified topics and sources"
-            )
-
-        # Generate comprehensive structured summary
-        try:
-            main_summary = generate_structured_news_summary(
-                api_key=GROQ_API_KEY,
-                news_data=news_data,
-                reddit_data=reddit_data,
-                topics=request.topics
-            )
-        except Exception as e:
-            print(f"Summary generation error: {e}")
-            main_summary = "Summary generation failed. Please check the logs for more details."
-
-        # Generate individual topic analyses
-        individual_analyses = {}
-        for topic in request.topics:
-            try:
-                # Collect data for this specific topic
-                topic_news = news_data.get("news_analysis", {}).get(topic, "") if news_data else ""
-                topic_reddit = reddit_data.get("reddit_analysis", {}).get(topic, "") if reddit_data else ""
-                
-                if topic_news or topic_reddit:
-                    # Create focused analysis for this topic
-                    topic_content = f"Topic: {topic}\n\n"
-                    if topic_news:
-                        topic_content += f"News Analysis:\n{topic_news}\n\n"
-                    if topic_reddit:
-                        topic_content += f"Reddit Analysis:\n{topic_reddit}\n\n"
-                    
-                    # Generate structured analysis for this topic
-                    topic_analysis = summarize_with_groq_structured(
-                        api_key=GROQ_API_KEY,
-                        headlines=topic_content
-                    )
-                    individual_analyses[topic] = topic_analysis
-                else:
-                    individual_analyses[topic] = f"No data available for topic: {topic}"
-                    
-            except Exception as e:
-                print(f"Individual topic analysis error for {topic}: {e}")
-                individual_analyses[topic] = f"Analysis failed for topic: {topic}"
-
-        # Prepare response data
-        response_data = {
-            "topics": request.topics,
-            "source_type": request.source_type,
-            "timestamp": datetime.now().isoformat(),
-            "summary": main_summary,
-            "individual_topics": individual_analyses,
-            "raw_data": raw_data,
-            "metadata": {
-                "total_topics": len(request.topics),
-                "sources_used": request.source_type,
-                "has_news_data": bool(news_data),
-                "has_reddit_data": bool(reddit_data),
-                "analysis_generated": True
-            }
-        }
-
-        return JSONResponse(content=response_data)
+        response_data = await run_summary(request)
+        return ORJSONResponse(content=response_data)
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Unexpected error in generate_news_summary: {e}")
+        logger.exception("Unexpected error in generate_news_summary")
         raise HTTPException(
             status_code=500, 
             detail=f"Internal server error: {str(e)}"
         )
 
 
+async def _summary_events(request: NewsRequest):
+    """Run the pipeline, publishing the final payload or error as the last event"""
+    try:
+        emit_event("complete", data=await run_summary(request))
+    except HTTPException as e:
+        emit_event("error", status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        logger.exception("Unexpected error in generate_news_summary_stream")
+        emit_event("error", status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+def _encode_event(event: dict, fmt: str) -> bytes:
+    if fmt == "sse":
+        return f"event: {event['event']}\ndata: ".encode() + orjson.dumps(event) + b"\n\n"
+    return orjson.dumps(event) + b"\n"
+
+
+@app.post("/generate-news-summary/stream")
+async def generate_news_summary_stream(request: NewsRequest, format: Literal["ndjson", "sse"] = "ndjson"):
+    """
+    Stream progress events (topic_scraped, topic_analysis, summary_token) ending with
+    a complete event carrying the same payload as /generate-news-summary
+    """
+    async def event_stream():
+        queue = asyncio.Queue()
+        task = asyncio.create_task(run_with_events(queue, _summary_events(request)))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (event := await queue.get()) is not None:
+                yield _encode_event(event, format)
+        finally:
+            # Client went away; stop scraping and summarizing for it
+            task.cancel()
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type)
+
+
+@app.post("/jobs")
+async def submit_job(request: NewsRequest):
+    """
+    Queue a summary job and return its id; identical in-flight jobs are shared
+    """
+    return job_manager.submit(request.model_dump())
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Return job status, partial results while running and the full result when completed
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return {"job_id": job_id, "status": job["status"]}
+
+
 @app.post("/quick-summary")
 async def quick_summary(request: NewsRequest):
     """
     Generate a quick summary without individual topic breakdown
     """
     try:
-        results = {}
-        
-        # Scrape sources based on request
-        if request.source_type in ["news", "both"]:
-            news_scraper = NewsScraper()
-            results["news"] = await news_scraper.scrape_news(request.topics)
-        
-        if request.source_type in ["reddit", "both"]:
-            results["reddit"] = await scrape_reddit_topics(request.topics)
-
-        # Generate quick summary
-        news_data = results.get("news", {})
-        reddit_data = results.get("reddit", {})
-        
-        summary = generate_structured_news_summary(
-            api_key=GROQ_API_KEY,
-            news_data=news_data,
-            reddit_data=reddit_data,
-            topics=request.topics
-        )
+        llm_cache_usage = track_llm_cache_usage()
+        with deadline_scope(request.deadline_seconds or REQUEST_DEADLINE_SECONDS):
+            pipeline = await run_summary_pipeline(request.topics, request.source_type, request.incremental)
+        news_data = pipeline["news"]
+        reddit_data = pipeline["reddit"]
+
+        if not news_data and not reddit_data:
+            raise HTTPException(
+                status_code=404,
+                detail="No data could be retrieved for the specified topics and sources"
+            )
 
         return {
             "topics": request.topics,
             "source_type": request.source_type,
             "timestamp": datetime.now().isoformat(),
-            "summary": summary
+            "summary": pipeline["summary"],
+            "cache": {
+                "news": news_data.get("cache", {}),
+                "reddit": reddit_data.get("cache", {})
+            },
+            "llm_cache": llm_cache_usage,
+            "dedup": news_data.get("dedup", {}),
+            "digest": news_data.get("digest", {}),
+            "topic_status": pipeline["status"],
+            "deadline": pipeline["deadline"],
+            "prompt": pipeline["prompt"],
+            "pipeline": {
+                **pipeline["timings"],
+                "llm_calls": llm_cache_usage["misses"] - llm_cache_usage["coalesced"]
+            }
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _require_archive():
+    if not archive.enabled:
+        raise HTTPException(status_code=503, detail="The archive is disabled (set ARCHIVE_DIR and install pyarrow)")
+
+
+@app.get("/archive/{topic}/trend")
+async def archive_trend(topic: str, days: int = Query(30, ge=1)):
+    """Headlines, distinct stories and publishers scraped per day, from the archive"""
+    _require_archive()
+    return {"topic": topic, "days": days, "trend": await asyncio.to_thread(archive.headline_trend, topic, days)}
+
+
+@app.get("/archive/{topic}/publishers")
+async def archive_publishers(topic: str, days: int = Query(30, ge=1), limit: int = Query(10, ge=1, le=100)):
+    """Publishers that carried the most archived headlines about topic"""
+    _require_archive()
+    return {"topic": topic, "days": days, "publishers": await asyncio.to_thread(archive.top_publishers, topic, days, limit)}
+
+
+@app.get("/archive/{topic}/history")
+async def archive_history(
+    topic: str,
+    source: Optional[Literal["news", "reddit", "report"]] = None,
+    days: Optional[int] = Query(None, ge=1),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """Past analyses of topic, newest first, without scraping anything"""
+    _require_archive()
+    return {"topic": topic, "history": await asyncio.to_thread(archive.history, topic, source, days, limit)}
+
+
 if __name__ == "__main__":
     import uvicorn
+
+    # With WORKERS > 1 config has set PROMETHEUS_MULTIPROC_DIR, which the workers inherit
     uvicorn.run(
         "backend:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=WORKERS == 1,
+        workers=WORKERS,
         log_level="info"
     )
\ No newline at end of file
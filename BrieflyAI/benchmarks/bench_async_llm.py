@@ -0,0 +1,147 @@
+"""
+Measure /generate-news-summary throughput at 20 concurrent clients when
+Groq is called with non-blocking ainvoke on the shared connection pool,
+against the same calls made with a blocking invoke() on the event loop.
+
+A local stub stands in for BrightData and the Groq chat completions API;
+every completion takes --llm-latency seconds. Each request uses fresh
+topics, so nothing is served from the scrape or LLM caches.
+
+Run from the BrieflyAI directory:
+    python -m benchmarks.bench_async_llm [--requests 60] [--concurrency 20] [--llm-latency 0.5]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from benchmarks.load_test import LoopMonitor, _drive, _percentiles
+
+
+def start_stub_server(llm_latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, so client connection pooling is exercised
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path.endswith("/chat/completions"):
+                time.sleep(llm_latency)
+                payload = json.dumps({
+                    "id": "stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "## Stub summary\n\n* A stubbed key point"},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {"prompt_tokens": 500, "completion_tokens": 100, "total_tokens": 600}
+                }).encode()
+                content_type = "application/json"
+            else:
+                # BrightData: a results page whose headlines name the searched topic
+                topic = parse_qs(urlparse(body.get("url", "")).query).get("q", ["topic"])[0]
+                articles = "".join(
+                    f"<article><a class='JtKRv' href='./{i}'>{topic} headline {i}</a></article>" for i in range(5)
+                )
+                payload = f"<html><body>{articles}</body></html>".encode()
+                content_type = "text/html"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run(args):
+    from aiolimiter import AsyncLimiter
+    from langchain_groq import ChatGroq
+    import backend
+    from services.news_scraper import NewsScraper
+
+    # The stub has no quota; keep the limiter out of the measurement
+    NewsScraper._rate_limiter = AsyncLimiter(10_000, 1)
+
+    counter = itertools.count()
+
+    def payload():
+        n = next(counter)
+        return {"topics": [f"Bench {n} alpha", f"Bench {n} beta"], "source_type": "news"}
+
+    async def blocking_ainvoke(self, input, config=None, **kwargs):
+        # How every Groq call used to be made: a synchronous request on the event loop
+        return self.invoke(input, config, **kwargs)
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=backend.app), base_url="http://bench", timeout=None)
+    lifespan = backend.lifespan(backend.app)
+    await lifespan.__aenter__()
+
+    print(f"{'mode':<10} {'ok':>4} {'err':>4} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'blocked ms':>11}")
+    async_ainvoke = ChatGroq.ainvoke
+    try:
+        for mode in args.modes:
+            ChatGroq.ainvoke = blocking_ainvoke if mode == "blocking" else async_ainvoke
+            monitor = LoopMonitor()
+            monitor.start()
+            latencies, errors, elapsed = await _drive(
+                client, "/generate-news-summary", payload, args.requests, args.concurrency
+            )
+            await monitor.stop()
+            pct = _percentiles(latencies)
+            print(
+                f"{mode:<10} {len(latencies):>4} {errors:>4} {len(latencies) / elapsed:>7.2f} "
+                f"{pct[50]:>9.0f} {pct[95]:>9.0f} {monitor.blocked * 1000:>11.0f}"
+            )
+    finally:
+        ChatGroq.ainvoke = async_ainvoke
+        await client.aclose()
+        await lifespan.__aexit__(None, None, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per stubbed completion")
+    parser.add_argument("--modes", nargs="+", default=["blocking", "async"], choices=["blocking", "async"])
+    args = parser.parse_args()
+
+    server = start_stub_server(args.llm_latency)
+    stub_url = f"http://127.0.0.1:{server.server_port}"
+    os.environ["GROQ_API_BASE"] = stub_url
+    os.environ["BRIGHTDATA_API_URL"] = f"{stub_url}/request"
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ.setdefault("BRIGHTDATA_API_KEY", "bench")
+    os.environ.setdefault("WEB_UNLOCKER_ZONE", "bench")
+    # Keep benchmark runs out of the persistent caches, job table and digests
+    os.environ["REPLAY_MODE"] = "off"
+    os.environ.setdefault("LLM_CACHE_DB", "")
+    os.environ.setdefault("ARCHIVE_DIR", "")
+    os.environ.setdefault("JOB_DB", ":memory:")
+    os.environ.setdefault("DIGEST_DB", ":memory:")
+    os.environ.setdefault("PREWARM_ENABLED", "false")
+    os.environ.setdefault("HEDGE_ENABLED", "false")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    asyncio.run(run(args))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Measure backend cold start: how long `import backend` takes, how long a
+fresh uvicorn process needs to answer its first /health, and which modules
+the import spends its time in (python -X importtime).
+
+Run from the BrieflyAI directory:
+    python -m benchmarks.bench_cold_start [--runs 5] [--top 15]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import backend; print(time.perf_counter() - start)"
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    # Only start-up is measured: no background work, nothing written to disk
+    env.setdefault("BRIGHTDATA_API_KEY", "bench")
+    env.setdefault("WEB_UNLOCKER_ZONE", "bench")
+    env.setdefault("JOB_DB", ":memory:")
+    env.setdefault("LLM_CACHE_DB", "")
+    env.setdefault("ARCHIVE_DIR", "")
+    env.setdefault("PREWARM_ENABLED", "false")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_seconds(env: dict) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=env, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def first_health_seconds(env: dict, timeout: float = 60.0) -> float:
+    """Seconds from spawning uvicorn until /health first answers 200"""
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client() as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise TimeoutError("backend did not answer /health")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def import_profile(env: dict, top: int):
+    """(cumulative microseconds, module) for the slowest top-level imports under backend"""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import backend"], env=env, capture_output=True, text=True)
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            rows.append((int(cumulative), name.rstrip()))
+    # Modules at most three levels deep, so the list points at what to defer
+    rows = [(us, name) for us, name in rows if len(name) - len(name.lstrip()) <= 7]
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args()
+    env = _env()
+
+    imports = [import_seconds(env) for _ in range(args.runs)]
+    health = [first_health_seconds(env) for _ in range(args.runs)]
+    print(f"{'measure':<24} {'median s':>9} {'min s':>7} {'max s':>7}")
+    for name, samples in (("import backend", imports), ("process to /health 200", health)):
+        print(f"{name:<24} {statistics.median(samples):>9.3f} {min(samples):>7.3f} {max(samples):>7.3f}")
+
+    print()
+    print(f"{'cumulative ms':>13}  module")
+    for us, name in import_profile(env, args.top):
+        print(f"{us / 1000:>13.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare the selector-based headline extractor with the BeautifulSoup text path.
+
+Run from the BrieflyAI directory:
+    python -m benchmarks.bench_headline_extraction --save "artificial intelligence"
+    python -m benchmarks.bench_headline_extraction [fixture.html ...]
+
+Without arguments every page saved under benchmarks/fixtures/ is used.
+"""
+import argparse
+import re
+import statistics
+import time
+from pathlib import Path
+
+from utils.scraping import (
+    generate_valid_news_url,
+    scrape_with_brightdata,
+    clean_html_to_text,
+    extract_headlines,
+    extract_headline_records
+)
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+
+
+def _time(fn, html: str, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(html)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def save_fixture(topic: str) -> Path:
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    path = FIXTURE_DIR / f"{re.sub(r'[^a-z0-9]+', '_', topic.lower())}.html"
+    path.write_text(scrape_with_brightdata(generate_valid_news_url(topic)), encoding="utf-8")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", nargs="*", type=Path)
+    parser.add_argument("--save", metavar="TOPIC", help="Scrape a Google News page into the fixtures directory")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.save:
+        print(f"Saved {save_fixture(args.save)}")
+        return
+
+    fixtures = args.fixtures or sorted(FIXTURE_DIR.glob("*.html"))
+    if not fixtures:
+        parser.error(f"No fixtures given and none found in {FIXTURE_DIR}; use --save TOPIC first")
+
+    print(f"{'fixture':<32} {'KB':>7} {'bs4 ms':>9} {'lxml ms':>9} {'speedup':>8} {'bs4 n':>6} {'lxml n':>7}")
+    for path in fixtures:
+        html = path.read_text(encoding="utf-8")
+        old_ms, old = _time(lambda h: extract_headlines(clean_html_to_text(h)), html, args.repeat)
+        new_ms, new = _time(extract_headline_records, html, args.repeat)
+        print(
+            f"{path.name:<32} {len(html) / 1024:>7.0f} {old_ms:>9.2f} {new_ms:>9.2f} "
+            f"{old_ms / new_ms:>7.1f}x {len(old.splitlines()):>6} {len(new):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Measure BrightData fetch tail latency with and without hedging against a
+local stub server that injects latency: most requests answer in about
+100 ms, a few stall for seconds.
+
+Run from the BrieflyAI directory:
+    python -m benchmarks.bench_hedging [--requests 300] [--concurrency 10] [--stall-rate 0.05]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE = b"<html><body><article><a class='JtKRv' href='./a'>Stub headline</a></article></body></html>"
+
+
+def start_stub_server(stall_rate: float, stall_seconds: float) -> ThreadingHTTPServer:
+    rng = random.Random(7)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                stalled = rng.random() < stall_rate
+                delay = stall_seconds if stalled else rng.lognormvariate(-2.3, 0.3)  # ~100 ms median
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _summary(samples):
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return f"p50 {cuts[49]:>7.0f}  p95 {cuts[94]:>7.0f}  p99 {cuts[98]:>7.0f}  max {max(samples):>7.0f}"
+
+
+async def run_pass(scraper, hedge: bool, requests: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def user():
+        for i in remaining:
+            start = time.perf_counter()
+            await scraper.scrape_page(f"https://news.google.com/search?q=bench{i}", hedge=hedge)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return latencies
+
+
+async def main(args):
+    from aiolimiter import AsyncLimiter
+    from services.news_scraper import NewsScraper
+    from utils.resilience import HEDGES
+
+    # The stub has no quota; keep the limiter out of the measurement
+    NewsScraper._rate_limiter = AsyncLimiter(10_000, 1)
+    scraper = NewsScraper()
+
+    baseline = await run_pass(scraper, False, args.requests, args.concurrency)
+    print(f"{'no hedging':<12} {_summary(baseline)}  (ms)")
+    delay = NewsScraper._latency.hedge_delay()
+    hedged = await run_pass(scraper, True, args.requests, args.concurrency)
+    sent = HEDGES.labels("brightdata", "sent")._value.get()
+    print(f"{'hedging':<12} {_summary(hedged)}  (ms; delay {delay * 1000:.0f} ms, {sent:.0f} hedges = {sent / args.requests:.1%} extra requests)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--stall-rate", type=float, default=0.02)
+    parser.add_argument("--stall-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.stall_rate, args.stall_seconds)
+    os.environ["BRIGHTDATA_API_URL"] = f"http://127.0.0.1:{server.server_port}/request"
+    os.environ.setdefault("BRIGHTDATA_API_KEY", "bench")
+    os.environ.setdefault("WEB_UNLOCKER_ZONE", "bench")
+    # HEDGE_MIN_DELAY floors the delay for real BrightData; the stub answers far faster
+    os.environ.setdefault("HEDGE_MIN_DELAY", "0.05")
+    asyncio.run(main(args))
+    server.shutdown()
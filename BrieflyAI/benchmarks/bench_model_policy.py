@@ -0,0 +1,99 @@
+"""
+Compare model routing policies (MODEL_POLICIES in config.py) on the full
+summary pipeline: map/reduce latency, Groq tokens per model and estimated
+cost per request.
+
+Each policy calls different models, so record every policy once with live
+credentials, then replay them offline:
+    python -m benchmarks.bench_model_policy --mode record --runs 1 --cassette policies.jsonl
+    python -m benchmarks.bench_model_policy --cassette policies.jsonl --runs 5
+
+Caches are cleared before every run so each one makes all of its LLM calls.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+from collections import defaultdict
+
+from benchmarks.load_test import _percentiles
+
+
+def _token_counts(registry, models):
+    return {
+        (model, kind): registry.get_sample_value("briefly_groq_tokens_total", {"model": model, "kind": kind}) or 0.0
+        for model in models
+        for kind in ("input", "output")
+    }
+
+
+async def run(args):
+    # Import after the environment is set up so config picks up the replay settings
+    from prometheus_client import REGISTRY
+    from config import MODEL_POLICIES, MODEL_TIERS
+    from services.pipeline import run_summary_pipeline
+    from utils.cache import scrape_cache, llm_cache
+    from utils.model_policy import use_policy, estimate_cost
+
+    models = sorted(set(MODEL_TIERS.values()))
+    policies = args.policies or list(MODEL_POLICIES)
+    print(f"{'policy':<10} {'runs':>4} {'map p50 ms':>11} {'reduce p50 ms':>14} {'total p50 ms':>13} {'total p95 ms':>13} {'tokens/run':>11} {'USD/run':>9}")
+    usage = {}
+    for policy in policies:
+        use_policy(policy)
+        timings = defaultdict(list)
+        before = _token_counts(REGISTRY, models)
+        for _ in range(args.runs):
+            scrape_cache.clear()
+            llm_cache.clear()
+            pipeline = await run_summary_pipeline(args.topics, args.source_type)
+            for name, value in pipeline["timings"].items():
+                timings[name].append(value)
+        after = _token_counts(REGISTRY, models)
+        spent = {key: (after[key] - before[key]) / args.runs for key in after}
+        usage[policy] = spent
+
+        tokens = sum(spent.values())
+        cost = sum(estimate_cost(model, spent[(model, "input")], spent[(model, "output")]) for model in models)
+        total = _percentiles(timings["total_ms"])
+        print(
+            f"{policy:<10} {args.runs:>4} {statistics.median(timings['map_ms']):>11.0f} "
+            f"{statistics.median(timings['reduce_ms']):>14.0f} {total[50]:>13.0f} {total[95]:>13.0f} "
+            f"{tokens:>11.0f} {cost:>9.5f}"
+        )
+
+    print()
+    print(f"{'policy':<10} {'model':<34} {'input/run':>10} {'output/run':>11}")
+    for policy, spent in usage.items():
+        for model in models:
+            if spent[(model, "input")] or spent[(model, "output")]:
+                print(f"{policy:<10} {model:<34} {spent[(model, 'input')]:>10.0f} {spent[(model, 'output')]:>11.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--cassette", default="benchmarks/fixtures/policies.jsonl")
+    parser.add_argument("--speed", type=float, default=1.0, help="Multiplier on recorded latencies")
+    parser.add_argument("--policies", nargs="+", help="Policies to compare; all by default")
+    parser.add_argument("--topics", nargs="+", default=["Artificial Intelligence", "Climate Change"])
+    parser.add_argument("--source-type", default="news", choices=["news", "reddit", "both"])
+    parser.add_argument("--runs", type=int, default=5, help="Pipeline runs per policy")
+    args = parser.parse_args()
+
+    os.environ["REPLAY_MODE"] = args.mode
+    os.environ["REPLAY_PATH"] = args.cassette
+    os.environ["REPLAY_SPEED"] = str(args.speed)
+    # Keep benchmark runs out of the persistent caches
+    os.environ.setdefault("LLM_CACHE_DB", "")
+    os.environ.setdefault("ARCHIVE_DIR", "")
+    # Groq clients are built even when replaying, the MCP server parameters at import time
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ.setdefault("BRIGHTDATA_API_KEY", "bench")
+    os.environ.setdefault("WEB_UNLOCKER_ZONE", "bench")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare the Reddit ReAct agent with the direct tool pipeline: LLM round
+trips, Groq tokens and latency per topic.
+
+Record both modes once with live credentials, then replay them offline:
+    python -m benchmarks.bench_reddit_modes --mode record --cassette reddit.jsonl
+    python -m benchmarks.bench_reddit_modes --cassette reddit.jsonl
+
+Latency is measured inside the MCP rate limiter, so it covers the analysis
+only, not the wait for a slot.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+
+MODES = ["agent", "pipeline"]
+
+
+async def run(args):
+    # Import after the environment is set up so config picks up the replay settings
+    from aiolimiter import AsyncLimiter
+    from services import reddit_scraper
+
+    if args.mode == "replay":
+        # Nothing external is called, so the 15 s MCP pacing only slows the run down
+        reddit_scraper.mcp_limiter = AsyncLimiter(1000, 1)
+
+    print(f"{'mode':<10} {'topic':<28} {'llm calls':>9} {'tokens':>8} {'latency ms':>11}")
+    totals = {}
+    for mode in args.reddit_modes:
+        results = await reddit_scraper.analyze_reddit_topics(args.topics, mode=mode)
+        for topic, analysis in results.items():
+            print(f"{mode:<10} {topic[:28]:<28} {analysis['llm_calls']:>9} {analysis['tokens']:>8} {analysis['latency_ms']:>11.0f}")
+        totals[mode] = list(results.values())
+
+    print()
+    print(f"{'mode':<10} {'mean llm calls':>14} {'mean tokens':>12} {'mean latency ms':>16}")
+    for mode, analyses in totals.items():
+        print(
+            f"{mode:<10} {statistics.mean(a['llm_calls'] for a in analyses):>14.1f} "
+            f"{statistics.mean(a['tokens'] for a in analyses):>12.0f} "
+            f"{statistics.mean(a['latency_ms'] for a in analyses):>16.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--cassette", default="benchmarks/fixtures/reddit.jsonl")
+    parser.add_argument("--speed", type=float, default=1.0, help="Multiplier on recorded latencies")
+    parser.add_argument("--reddit-modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--topics", nargs="+", default=["Artificial Intelligence", "Climate Change"])
+    args = parser.parse_args()
+
+    os.environ["REPLAY_MODE"] = args.mode
+    os.environ["REPLAY_PATH"] = args.cassette
+    os.environ["REPLAY_SPEED"] = str(args.speed)
+    os.environ.setdefault("LLM_CACHE_DB", "")
+    os.environ.setdefault("ARCHIVE_DIR", "")
+    # Groq clients are built even when replaying, the MCP server parameters at import time
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ.setdefault("BRIGHTDATA_API_KEY", "bench")
+    os.environ.setdefault("WEB_UNLOCKER_ZONE", "bench")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
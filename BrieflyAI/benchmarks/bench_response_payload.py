@@ -0,0 +1,86 @@
+"""
+Measure /generate-news-summary payload size and serialization time on a
+synthetic three-topic response.
+
+Run from the BrieflyAI directory:
+    python -m benchmarks.bench_response_payload
+"""
+import gzip
+import json
+import os
+import statistics
+import time
+
+import orjson
+
+# backend builds the MCP server parameters at import time
+os.environ.setdefault("BRIGHTDATA_API_KEY", "bench")
+os.environ.setdefault("WEB_UNLOCKER_ZONE", "bench")
+
+from backend import build_summary_response
+from models import NewsRequest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TOPICS = ["Artificial Intelligence", "Climate Change", "Elections"]
+ANALYSIS = (
+    "## Executive Summary\n" + "The main themes of the day in a few sentences. " * 12 + "\n\n"
+    "## Key Stories\n" + "- A major headline with a detailed explanation of what happened.\n" * 15 + "\n"
+    "## Analysis\n" + "What these stories mean and why they matter. " * 20 + "\n\n"
+    "## Trends\n" + "Patterns and connections between the stories. " * 10
+)
+HEADLINES = "\n".join(f"Headline {i} about the topic (Publisher {i % 9}, 2025-01-01T10:00:00Z)" for i in range(60))
+
+
+def fake_pipeline():
+    return {
+        "news": {
+            "news_analysis": {topic: ANALYSIS for topic in TOPICS},
+            "raw_headlines": {topic: HEADLINES for topic in TOPICS},
+            "cache": {topic: {"status": "miss", "age_seconds": 0.0} for topic in TOPICS},
+        },
+        "reddit": {
+            "reddit_analysis": {topic: ANALYSIS for topic in TOPICS},
+            "cache": {topic: {"status": "miss", "age_seconds": 0.0} for topic in TOPICS},
+        },
+        "summary": ANALYSIS * 3,
+        "prompt": {},
+        "timings": {"map_ms": 0.0, "reduce_ms": 0.0, "total_ms": 0.0},
+    }
+
+
+def _median_ms(fn, repeat=200):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    usage = {"hits": 0, "misses": 7, "coalesced": 0, "tokens_saved": 0, "ms_saved": 0.0}
+    variants = {
+        "before (raw_data, stdlib json)": dict(include_raw_data=True),
+        "default (no raw_data)": {},
+        "fields=summary,topics": dict(fields=["summary", "topics"]),
+    }
+
+    print(f"{'variant':<32} {'bytes':>8} {'gzip':>7} {'brotli':>7} {'json ms':>8} {'orjson ms':>10}")
+    for name, options in variants.items():
+        request = NewsRequest(topics=TOPICS, source_type="both", **options)
+        payload = build_summary_response(request, fake_pipeline(), usage)
+        raw = orjson.dumps(payload)
+        print(
+            f"{name:<32} {len(raw):>8} {len(gzip.compress(raw)):>7} "
+            f"{len(brotli.compress(raw)) if brotli else '-':>7} "
+            f"{_median_ms(lambda: json.dumps(payload).encode()):>8.3f} "
+            f"{_median_ms(lambda: orjson.dumps(payload)):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
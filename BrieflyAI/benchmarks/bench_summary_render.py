@@ -0,0 +1,65 @@
+"""
+Measure what display_summary_results costs on each Streamlit rerun for a
+long report: rendering the report HTML and building both downloads from
+scratch, against the cached artifacts from render_summary.
+
+Run from the BrieflyAI directory:
+    python -m benchmarks.bench_summary_render [--repeat 200]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.bench_response_payload import fake_pipeline
+from utils.rendering import content_hash, summary_to_html, export_json, export_text
+
+
+def fake_summary_data() -> dict:
+    pipeline = fake_pipeline()
+    return {
+        "summary": pipeline["summary"] * 4,
+        "topics": ["Artificial Intelligence", "Climate Change", "Elections"],
+        "source_type": "both",
+        "timestamp": "2025-01-01 10:00",
+        "news": pipeline["news"],
+        "reddit": pipeline["reddit"],
+        "metadata": {}
+    }
+
+
+def _median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    # Outside `streamlit run` the cache still works; it warns once about the missing runtime
+    from main import render_summary
+
+    summary_data = fake_summary_data()
+    key = content_hash(summary_data)
+
+    def uncached():
+        summary_to_html(summary_data["summary"])
+        export_json(summary_data)
+        export_text(summary_data)
+        len(summary_data["summary"].split())
+
+    render_summary(key, summary_data)
+    print(f"summary: {len(summary_data['summary']):,} chars, payload JSON: {len(export_json(summary_data)):,} bytes")
+    print(f"{'rerun':<22} {'median ms':>10}")
+    print(f"{'render every rerun':<22} {_median_ms(uncached, args.repeat):>10.3f}")
+    print(f"{'cached render':<22} {_median_ms(lambda: render_summary(key, summary_data), args.repeat):>10.3f}")
+    print(f"{'content hash (once)':<22} {_median_ms(lambda: content_hash(summary_data), args.repeat):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Measure /generate-news-summary throughput for every uvicorn worker count from 1 to 8.
+
+Each server replays a recorded cassette (see benchmarks/load_test.py) and
+shares its caches and rate limiters through one SQLite store, as in
+production multi-worker mode.
+
+Run from the BrieflyAI directory:
+    python -m benchmarks.bench_workers --cassette benchmarks/fixtures/replay.jsonl
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.load_test import _drive, _percentiles
+
+
+def start_server(workers: int, port: int, args, state_dir: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "WORKERS": str(workers),
+        "SHARED_STORE": "sqlite",
+        "SHARED_STORE_DB": os.path.join(state_dir, "shared.db"),
+        "JOB_DB": os.path.join(state_dir, "jobs.db"),
+        "DIGEST_DB": os.path.join(state_dir, "digests.db"),
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(state_dir, f"metrics-{workers}"),
+        "LLM_CACHE_DB": "",
+        "ARCHIVE_DIR": "",
+        "REPLAY_MODE": "replay",
+        "REPLAY_PATH": args.cassette,
+        "REPLAY_SPEED": str(args.speed),
+        "PREWARM_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+    env.setdefault("BRIGHTDATA_API_KEY", "bench")
+    env.setdefault("WEB_UNLOCKER_ZONE", "bench")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env
+    )
+
+
+async def wait_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{url}/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+async def measure(url: str, args):
+    payload = {"topics": args.topics, "source_type": args.source_type}
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        # Warm every worker's view of the shared caches before timing
+        await _drive(client, "/generate-news-summary", payload, args.concurrency, args.concurrency)
+        return await _drive(client, "/generate-news-summary", payload, args.requests, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", default="benchmarks/fixtures/replay.jsonl")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=list(range(1, 9)), help="Worker counts to measure, 1 to 8 by default")
+    parser.add_argument("--topics", nargs="+", default=["Artificial Intelligence", "Climate Change"])
+    parser.add_argument("--source-type", default="news", choices=["news", "reddit", "both"])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}")
+    print(f"{'workers':>7} {'ok':>5} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as state_dir:
+            server = start_server(workers, args.port, args, state_dir)
+            try:
+                url = f"http://127.0.0.1:{args.port}"
+                asyncio.run(wait_ready(url))
+                latencies, errors, elapsed = asyncio.run(measure(url, args))
+            finally:
+                server.terminate()
+                server.wait()
+        pct = _percentiles(latencies)
+        print(
+            f"{workers:>7} {len(latencies):>5} {errors:>4} {len(latencies) / elapsed:>8.1f} "
+            f"{pct[50]:>8.1f} {pct[95]:>8.1f} {pct[99]:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Load test /generate-news-summary and /quick-summary against recorded
+BrightData, MCP agent and Groq calls.
+
+Record a cassette once with live credentials, then replay it offline:
+    python -m benchmarks.load_test --mode record --requests 1 --concurrency 1
+    python -m benchmarks.load_test --concurrency 8 --requests 40
+
+The app runs in-process, so the event-loop monitor sees any blocking done
+by request handlers. Pass --url to load an already running server instead
+(event-loop blocking is then not measured).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+ENDPOINTS = ["/generate-news-summary", "/quick-summary"]
+
+
+class LoopMonitor:
+    """Measure how long the event loop is stalled beyond a short sleep"""
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.001):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocked = 0.0
+        self.max_stall = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - start - self.interval
+            if lag > self.threshold:
+                self.blocked += lag
+                self.max_stall = max(self.max_stall, lag)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+def _percentiles(samples):
+    if len(samples) < 2:
+        return {p: (samples[0] if samples else 0.0) for p in (50, 95, 99)}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {50: cuts[49], 95: cuts[94], 99: cuts[98]}
+
+
+async def _drive(client, endpoint, payload, total, concurrency, before_request=None):
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def user():
+        nonlocal errors
+        for _ in remaining:
+            if before_request:
+                before_request()
+            start = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=payload() if callable(payload) else payload)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                errors += 1
+                print(f"  {endpoint} failed: {e}")
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def _clear_caches():
+    from utils.cache import scrape_cache, llm_cache
+
+    scrape_cache.clear()
+    llm_cache.clear()
+
+
+async def run(args):
+    payload = {"topics": args.topics, "source_type": args.source_type}
+    if args.deadline:
+        payload["deadline_seconds"] = args.deadline
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=None)
+        lifespan = None
+    else:
+        # Import after the environment is set up so config picks up the replay settings
+        import backend
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=backend.app), base_url="http://bench", timeout=None)
+        lifespan = backend.lifespan(backend.app)
+        await lifespan.__aenter__()
+    # --cold can only clear the caches of the in-process app
+    before_request = _clear_caches if args.cold and not args.url else None
+
+    print(f"{'endpoint':<24} {'ok':>4} {'err':>4} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'blocked ms':>11} {'max stall':>10}")
+    try:
+        for endpoint in args.endpoints:
+            monitor = LoopMonitor()
+            monitor.start()
+            latencies, errors, elapsed = await _drive(
+                client, endpoint, payload, args.requests, args.concurrency, before_request
+            )
+            await monitor.stop()
+
+            pct = _percentiles(latencies)
+            blocked = "-" if args.url else f"{monitor.blocked * 1000:.1f}"
+            stall = "-" if args.url else f"{monitor.max_stall * 1000:.1f}"
+            print(
+                f"{endpoint:<24} {len(latencies):>4} {errors:>4} {len(latencies) / elapsed:>7.2f} "
+                f"{pct[50]:>9.1f} {pct[95]:>9.1f} {pct[99]:>9.1f} {blocked:>11} {stall:>10}"
+            )
+    finally:
+        await client.aclose()
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Load a running server instead of the in-process app")
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--cassette", default="benchmarks/fixtures/replay.jsonl")
+    parser.add_argument("--speed", type=float, default=1.0, help="Multiplier on recorded latencies")
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS, choices=ENDPOINTS)
+    parser.add_argument("--topics", nargs="+", default=["Artificial Intelligence", "Climate Change"])
+    parser.add_argument("--source-type", default="news", choices=["news", "reddit", "both"])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--cold", action="store_true", help="Clear the scrape and LLM caches before every request")
+    parser.add_argument("--deadline", type=float, help="deadline_seconds sent with every request")
+    args = parser.parse_args()
+
+    os.environ["REPLAY_MODE"] = args.mode
+    os.environ["REPLAY_PATH"] = args.cassette
+    os.environ["REPLAY_SPEED"] = str(args.speed)
+    # Keep benchmark runs out of the persistent caches and job table
+    os.environ.setdefault("LLM_CACHE_DB", "")
+    os.environ.setdefault("ARCHIVE_DIR", "")
+    os.environ.setdefault("JOB_DB", ":memory:")
+    # backend builds the MCP server parameters at import time
+    os.environ.setdefault("BRIGHTDATA_API_KEY", "bench")
+    os.environ.setdefault("WEB_UNLOCKER_ZONE", "bench")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
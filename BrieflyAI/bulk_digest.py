@@ -0,0 +1,176 @@
+"""
+Headless digests for long topic lists, e.g. a nightly run over 100+ topics.
+
+Topics are read from a file (one per line, # starts a comment) and analyzed
+in batches by the same map stage the API uses, so BrightData and MCP calls go
+through the shared rate limiters and caches. Each topic's result is appended
+to an NDJSON file as soon as its batch finishes; that file is the checkpoint,
+and rerunning the same command skips topics that already finished.
+
+Run from the BrieflyAI directory:
+    python bulk_digest.py topics.txt --output digests.ndjson [--source-type both] [--incremental]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import List, Set
+
+import orjson
+
+from config import BULK_CONCURRENCY, BULK_BATCH_SIZE, BULK_BATCH_DEADLINE_SECONDS
+from services.pipeline import map_stage, build_topic_sections, topic_status
+from utils.archive import archive
+from utils.cache import normalize_topic
+from utils.deadline import deadline_scope
+from utils.logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def read_topics(path: str) -> List[str]:
+    """Topics in file order, without blank lines, comments or repeats"""
+    topics = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            topic = line.split("#", 1)[0].strip()
+            if topic and normalize_topic(topic) not in seen:
+                seen.add(normalize_topic(topic))
+                topics.append(topic)
+    return topics
+
+
+def finished_topics(path: str) -> Set[str]:
+    """Normalized topics whose latest line in the output has every source "ok" """
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue  # A line cut short by an interrupted run
+            key = normalize_topic(record["topic"])
+            if all(state == "ok" for state in record["status"].values()):
+                finished.add(key)
+            else:
+                finished.discard(key)
+    return finished
+
+
+class BulkDigest:
+    """Analyze batches of topics concurrently and append one NDJSON line per topic"""
+
+    def __init__(
+        self,
+        output: str,
+        source_type: str,
+        incremental: bool = False,
+        concurrency: int = BULK_CONCURRENCY,
+        batch_size: int = BULK_BATCH_SIZE,
+        deadline_seconds: float = BULK_BATCH_DEADLINE_SECONDS
+    ):
+        self.output = output
+        self.source_type = source_type
+        self.incremental = incremental
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.deadline_seconds = deadline_seconds
+        self.stats = {"topics": 0, "ok": 0, "failed": 0}
+        self._start = None
+
+    async def run(self, topics: List[str]) -> dict:
+        batches = asyncio.Queue()
+        for i in range(0, len(topics), self.batch_size):
+            batches.put_nowait(topics[i:i + self.batch_size])
+
+        self.stats["topics"] = len(topics)
+        self._start = time.perf_counter()
+        with open(self.output, "ab") as out:
+            workers = [asyncio.create_task(self._worker(batches, out)) for _ in range(self.concurrency)]
+            await asyncio.gather(*workers)
+        await archive.drain()
+        self.stats["elapsed_seconds"] = round(time.perf_counter() - self._start, 1)
+        return self.stats
+
+    async def _worker(self, batches: asyncio.Queue, out):
+        while not batches.empty():
+            batch = batches.get_nowait()
+            try:
+                with deadline_scope(self.deadline_seconds):
+                    results = await map_stage(batch, self.source_type, self.incremental)
+            except Exception as e:
+                logger.warning("Bulk batch failed", extra={"topics": batch, "error": str(e)})
+                results = {}
+            self._write(out, batch, results)
+
+    def _write(self, out, batch: List[str], results: dict):
+        sections = build_topic_sections(batch, results.get("news", {}), results.get("reddit", {}))
+        status = topic_status(batch, results) if results else {topic: {"batch": "error"} for topic in batch}
+        finished_at = datetime.now().isoformat()
+        for topic in batch:
+            ok = all(state == "ok" for state in status[topic].values())
+            self.stats["ok" if ok else "failed"] += 1
+            out.write(orjson.dumps({
+                "topic": topic,
+                "status": status[topic],
+                "news": (results.get("news") or {}).get("news_analysis", {}).get(topic),
+                "reddit": (results.get("reddit") or {}).get("reddit_analysis", {}).get(topic),
+                "content": sections[topic],
+                "finished_at": finished_at
+            }) + b"\n")
+        # One flush per batch, so an interrupted run loses at most the batches in flight
+        out.flush()
+
+        done = self.stats["ok"] + self.stats["failed"]
+        elapsed = time.perf_counter() - self._start
+        logger.info(
+            "Bulk progress: %d/%d topics, %d failed, %.1f topics/min",
+            done, self.stats["topics"], self.stats["failed"], done / elapsed * 60 if elapsed else 0.0
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("topics_file", help="One topic per line")
+    parser.add_argument("--output", default="digests.ndjson", help="NDJSON results, also the resume checkpoint")
+    parser.add_argument("--source-type", default="news", choices=["news", "reddit", "both"])
+    parser.add_argument("--incremental", action="store_true", help="Only summarize headlines new since each topic's last digest")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY, help="Batches in flight")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    parser.add_argument("--deadline", type=float, default=BULK_BATCH_DEADLINE_SECONDS, help="Seconds per batch")
+    parser.add_argument("--restart", action="store_true", help="Discard the output file instead of resuming from it")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+
+    topics = read_topics(args.topics_file)
+    finished = finished_topics(args.output)
+    pending = [topic for topic in topics if normalize_topic(topic) not in finished]
+    logger.info("Bulk digest: %d topics, %d already finished", len(topics), len(topics) - len(pending))
+    if not pending:
+        return
+
+    bulk = BulkDigest(
+        args.output,
+        args.source_type,
+        incremental=args.incremental,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        deadline_seconds=args.deadline
+    )
+    stats = asyncio.run(bulk.run(pending))
+    logger.info(
+        "Bulk digest finished in %.1f s: %d ok, %d failed (rerun to retry them)",
+        stats["elapsed_seconds"], stats["ok"], stats["failed"]
+    )
+
+
+if __name__ == "__main__":
+    main()
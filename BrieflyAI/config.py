@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,6 +8,7 @@ load_dotenv()
 # Constants
 SOURCE_TYPES = ["news", "reddit", "both"]
 BACKEND_URL = "http://localhost:8000"
+PROGRESS_UPDATE_SECONDS = 0.25  # Minimum interval between frontend progress redraws while streaming
 TWO_WEEKS_AGO = datetime.today() - timedelta(days=14)
 TWO_WEEKS_AGO_STR = TWO_WEEKS_AGO.strftime('%Y-%m-%d')
 
@@ -17,9 +19,168 @@ WEB_UNLOCKER_ZONE = os.getenv("WEB_UNLOCKER_ZONE")
 
 # Model Names
 LLAMA_70b_model = "llama-3.3-70b-versatile"
+LLAMA_8b_model = "llama-3.1-8b-instant"
 DEEPSEEK = "deepseek-r1-distill-llama-70b"
 
 #Parameters
 TEMPERATURE = 0.1
 MAX_TOKEN_1 = 2000
-MAX_TOKEN_2 = 3000
\ No newline at end of file
+MAX_TOKEN_2 = 3000
+MAX_TOKEN_3 = 800  # Incremental digest updates
+
+# Scrape cache
+SCRAPE_CACHE_TTL = {
+    "news": int(os.getenv("NEWS_CACHE_TTL", 900)),
+    "reddit": int(os.getenv("REDDIT_CACHE_TTL", 1800)),
+}
+SCRAPE_CACHE_STALE_SECONDS = int(os.getenv("SCRAPE_CACHE_STALE_SECONDS", 3600))
+SCRAPE_CACHE_MAX_ENTRIES = 256
+SCRAPE_CACHE_DB = os.getenv("SCRAPE_CACHE_DB")  # Optional SQLite file, survives restarts
+
+# LLM response cache
+LLM_CACHE_MAX_ENTRIES = 512
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "llm_cache.db")  # Set empty to disable persistence
+
+# Background jobs
+JOB_DB = os.getenv("JOB_DB", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 100))
+
+# Headline deduplication
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0.8))  # Min Jaccard of content words within a cluster
+NEAR_DUPLICATE_MIN_SHARED_WORDS = int(os.getenv("NEAR_DUPLICATE_MIN_SHARED_WORDS", 4))  # Short headlines need this many words in common
+CROSS_TOPIC_THRESHOLD = float(os.getenv("CROSS_TOPIC_THRESHOLD", 0.95))  # Min Jaccard to take a headline away from another topic
+DEDUP_ACROSS_TOPICS = os.getenv("DEDUP_ACROSS_TOPICS", "true").lower() == "true"
+
+# Prompt budgets
+SUMMARY_CONTEXT_BUDGET = int(os.getenv("SUMMARY_CONTEXT_BUDGET", 6000))  # Tokens for all topic blocks
+TOKENIZER_ENCODING = "cl100k_base"
+
+# Responses
+COMPRESSION_MINIMUM_SIZE = 1000  # Bytes; smaller responses are sent uncompressed
+
+# Logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+
+# Record/replay of external calls (BrightData, MCP agent, Groq)
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off")  # "off", "record" or "replay"
+REPLAY_PATH = os.getenv("REPLAY_PATH", "replay.jsonl")
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", 1.0))  # Multiplier on recorded latencies; 0 replays instantly
+
+# Request coalescing
+SINGLEFLIGHT_BUCKET_SECONDS = int(os.getenv("SINGLEFLIGHT_BUCKET_SECONDS", 60))  # Identical work is shared within a bucket
+
+# Reddit analysis
+REDDIT_MODE = os.getenv("REDDIT_MODE", "agent")  # "agent" (ReAct tool loop) or "pipeline" (search, filter, one summary call)
+REDDIT_MAX_AGE_DAYS = 14
+REDDIT_MIN_SCORE = int(os.getenv("REDDIT_MIN_SCORE", 5))  # Upvotes a post needs to be summarized
+REDDIT_MAX_POSTS = 2  # Per topic, highest scored first
+REDDIT_SEARCH_RESULTS = 5  # Candidate post URLs scraped per topic
+REDDIT_MAX_COMMENTS = 10  # Per post, highest scored first
+REDDIT_CONTEXT_BUDGET = 3000  # Tokens of post and comment text sent to the summary call
+REDDIT_SEARCH_TOOL = "search_engine"  # BrightData MCP tool names used by the pipeline
+REDDIT_POST_TOOL = "web_data_reddit_posts"
+REDDIT_FETCH_CONCURRENCY = int(os.getenv("REDDIT_FETCH_CONCURRENCY", 2))  # MCP post fetches in flight per process, across topics
+
+# Topic pre-warming
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+PREWARM_WINDOW_SECONDS = int(os.getenv("PREWARM_WINDOW_SECONDS", 24 * 3600))  # Popularity is counted over this window
+PREWARM_INTERVAL_SECONDS = int(os.getenv("PREWARM_INTERVAL_SECONDS", 600))
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", 5))  # Per source
+PREWARM_MIN_REQUESTS = int(os.getenv("PREWARM_MIN_REQUESTS", 2))
+PREWARM_BRIGHTDATA_BUDGET = int(os.getenv("PREWARM_BRIGHTDATA_BUDGET", 10))  # Calls per interval
+PREWARM_GROQ_BUDGET = int(os.getenv("PREWARM_GROQ_BUDGET", 10))  # Calls per interval
+PREWARM_COSTS = {
+    "news": {"brightdata": 1, "groq": 1},
+    # Agent mode is an estimate: it searches, fetches posts and reasons over them in several round trips
+    "reddit": {"brightdata": 3, "groq": 4} if REDDIT_MODE == "agent" else {"brightdata": 1 + REDDIT_SEARCH_RESULTS, "groq": 1},
+}
+
+# Incremental digests
+DIGEST_DB = os.getenv("DIGEST_DB", "digests.db")
+DIGEST_MAX_UPDATES = int(os.getenv("DIGEST_MAX_UPDATES", 3))  # Delta sections merged before a full re-summary
+DIGEST_MAX_FINGERPRINTS = 1000  # Per topic
+
+# BrightData resilience
+BRIGHTDATA_API_URL = os.getenv("BRIGHTDATA_API_URL", "https://api.brightdata.com/request")
+BRIGHTDATA_MAX_THREADS = int(os.getenv("BRIGHTDATA_MAX_THREADS", 32))  # Hedged-away requests hold a thread until they finish
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_PERCENTILE = 0.95  # A duplicate request is sent once the first is slower than this percentile
+HEDGE_INITIAL_DELAY = 10.0  # Seconds, until HEDGE_MIN_SAMPLES latencies are recorded
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", 1.0))
+HEDGE_MIN_SAMPLES = 20
+HEDGE_WINDOW = 200  # Recent latencies the percentile is computed over
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))  # Consecutive failures that open the circuit
+CIRCUIT_RESET_SECONDS = int(os.getenv("CIRCUIT_RESET_SECONDS", 30))  # Open time before a trial request is let through
+
+# Multi-worker serving
+WORKERS = int(os.getenv("WORKERS", 1))  # uvicorn worker processes; reload is only used with a single worker
+SHARED_STORE = os.getenv("SHARED_STORE", "sqlite" if WORKERS > 1 else "memory")  # "memory", "sqlite" or "redis"
+SHARED_STORE_DB = os.getenv("SHARED_STORE_DB", "shared.db")  # Rate limits, leases and caches when SHARED_STORE=sqlite
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Prometheus multiprocess mode, so /metrics aggregates every worker. It has to be set before
+# prometheus_client is imported, and config is imported first. `uvicorn backend:app --workers N`
+# needs WORKERS=N (or PROMETHEUS_MULTIPROC_DIR) exported; workers of one server share a parent
+# process, so they agree on the directory.
+if WORKERS > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(tempfile.gettempdir(), f"briefly-metrics-{os.getppid()}")
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+# Model routing
+MODEL_TIERS = {
+    "fast": LLAMA_8b_model,
+    "large": LLAMA_70b_model,
+    "reasoning": DEEPSEEK,
+}
+# Pipeline stage -> tier, one mapping per policy
+MODEL_POLICIES = {
+    # Per-topic map summaries on the small model, 70B for the final report
+    "tiered": {
+        "headline_summary": "fast",
+        "headline_delta": "fast",
+        "reddit_summary": "fast",
+        "reddit_agent": "reasoning",  # deepseek-r1, as before routing; 70B after a 429
+        "report": "large",
+    },
+    # Everything on 70B, with the Reddit agent reasoning on deepseek-r1
+    "large": {
+        "headline_summary": "large",
+        "headline_delta": "large",
+        "reddit_summary": "large",
+        "reddit_agent": "reasoning",
+        "report": "large",
+    },
+}
+MODEL_POLICY = os.getenv("MODEL_POLICY", "tiered")
+MODEL_FALLBACKS = {"fast": ["large"], "large": ["fast"], "reasoning": ["large"]}  # Tiers tried in order after a 429
+MODEL_PRICES = {  # USD per million input and output tokens, for cost estimates
+    LLAMA_8b_model: (0.05, 0.08),
+    LLAMA_70b_model: (0.59, 0.79),
+    DEEPSEEK: (0.75, 0.99),
+}
+
+# Request deadlines
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", 110))  # Synchronous endpoints; the frontend gives up after 120 s
+DEADLINE_REDUCE_SHARE = 0.25  # Share of the budget kept for the final report; the map stage gets the rest
+DEADLINE_SCRAPE_SHARE = 0.6  # Share of the map stage news scraping may take; summaries need the rest
+
+# Groq client
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", 100))  # One pool shared by every model's client
+GROQ_MAX_KEEPALIVE_CONNECTIONS = 20
+GROQ_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", 60))
+
+# Bulk digests (bulk_digest.py)
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", 4))  # Batches in flight; the BrightData and MCP rate limits set the pace
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 5))  # Topics per batch, which share one MCP session for Reddit
+BULK_BATCH_DEADLINE_SECONDS = float(os.getenv("BULK_BATCH_DEADLINE_SECONDS", 300))  # Per batch; unfinished topics are retried on resume
+
+# Archive of scraped articles, Reddit posts and analyses
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")  # Parquet files partitioned by date and topic; set empty to disable
+
+# Start-up
+# Heavy modules (LangChain, MCP, LangGraph, pyarrow) load on first use. WARMUP loads them
+# after start-up in the background, before serving with "startup", or only on first use with "off".
+WARMUP = os.getenv("WARMUP", "background")
@@ -2,8 +2,10 @@ import streamlit as st
 import json
 import requests
 import datetime
+import time
 from typing import Literal
-from config import SOURCE_TYPES, BACKEND_URL
+from config import SOURCE_TYPES, BACKEND_URL, PROGRESS_UPDATE_SECONDS
+from utils.rendering import content_hash, summary_to_html, export_json, export_text
 
 # Custom CSS for enhanced styling
 def load_custom_css():
@@ -281,6 +283,10 @@ def main():
             }[x],
             help="Select which sources to analyze for your topics"
         )
+        incremental = st.checkbox(
+            "Only new headlines since last run",
+            help="Summarize just the news that changed and merge it into each topic's previous digest"
+        )
         st.markdown('</div>', unsafe_allow_html=True)
         
         st.markdown("""
@@ -417,38 +423,15 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
                 
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
                 try:
-                    # Simulate progress updates
-                    for i in range(100):
-                        progress_bar.progress(i + 1)
-                        if i < 30:
-                            status_text.text("🔍 Searching news sources...")
-                        elif i < 60:
-                            status_text.text("💬 Analyzing Reddit discussions...")
-                        elif i < 90:
-                            status_text.text("🧠 Generating insights...")
-                        else:
-                            status_text.text("📊 Finalizing analysis...")
-                    
-                    response = requests.post(
-                        f"{BACKEND_URL}/generate-news-summary",
-                        json={
-                            "topics": st.session_state.topics,
-                            "source_type": source_type
-                        },
-                        timeout=120
-                    )
-
-                    if response.status_code == 200:
-                        st.session_state.summary_data = response.json()
+                    summary_data = stream_analysis(st.session_state.topics, source_type, incremental)
+
+                    if summary_data:
+                        st.session_state.summary_data = summary_data
+                        st.session_state.summary_key = content_hash(summary_data)
                         st.markdown('<div class="custom-alert alert-success"> Analysis completed successfully!</div>', unsafe_allow_html=True)
                         st.balloons()
                         st.rerun()
-                    else:
-                        handle_api_error(response)
 
                 except requests.exceptions.ConnectionError:
                     st.markdown('<div class="custom-alert alert-error"> Connection Error: Could not reach the backend server. Please ensure the backend is running.</div>', unsafe_allow_html=True)
@@ -459,11 +442,129 @@ def main():
 
     # Display results with enhanced styling
     if st.session_state.summary_data:
-        display_summary_results(st.session_state.summary_data)
+        display_summary_results(st.session_state.summary_data, st.session_state.summary_key)
+
+
+def stream_analysis(topics, source_type, incremental=False):
+    """
+    Consume the streaming endpoint, rendering topic sections and the report as they arrive.
+
+    Progress counts real pipeline stages: sources fetched, topic analyses
+    finished and the report being written. Redraws of the progress bar,
+    status line and report are limited to one per PROGRESS_UPDATE_SECONDS.
+    """
+    sources = ["news", "reddit"] if source_type == "both" else [source_type]
+    total = len(topics) * len(sources)
+    fetched = set()
+    analyzed = set()
+    report = {"started": False, "words": 0}
+
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    status_text.text("🔍 Contacting the backend...")
+
+    topic_placeholders = {topic: st.empty() for topic in topics}
+    topic_sections = {topic: {} for topic in topics}
+    summary_placeholder = st.empty()
+    summary_parts = []
+    last_redraw = 0.0
+
+    def redraw(force=False):
+        nonlocal last_redraw
+        now = time.monotonic()
+        if not force and now - last_redraw < PROGRESS_UPDATE_SECONDS:
+            return
+        last_redraw = now
+
+        # Fetching and analysis are one step each per (topic, source); the report is the last
+        done = len(fetched) + len(analyzed) + (0.5 if report["started"] else 0)
+        progress_bar.progress(min(done / (2 * total + 1), 1.0))
+        stage = f"📰 Sources fetched {len(fetched)}/{total} · ✅ Topics analyzed {len(analyzed)}/{total}"
+        if report["started"]:
+            stage += f" · 🧠 Writing report ({report['words']} words)"
+        status_text.text(stage)
+        if summary_parts:
+            summary_placeholder.markdown("".join(summary_parts))
+
+    with requests.post(
+        f"{BACKEND_URL}/generate-news-summary/stream",
+        json={
+            "topics": topics,
+            "source_type": source_type,
+            "incremental": incremental
+        },
+        stream=True,
+        timeout=(10, 120)
+    ) as response:
+        if response.status_code != 200:
+            handle_api_error(response)
+            return None
+
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            kind = event["event"]
+
+            if kind == "topic_scraped":
+                fetched.add((event["topic"], event["source"]))
+                redraw()
+
+            elif kind == "topic_analysis":
+                topic = event["topic"]
+                # Cached analyses arrive without a fetch
+                fetched.add((topic, event["source"]))
+                analyzed.add((topic, event["source"]))
+                topic_sections[topic][event["source"]] = event["content"]
+                sections = [
+                    f"**{'News' if source == 'news' else 'Reddit'}**\n\n{content}"
+                    for source, content in topic_sections[topic].items()
+                ]
+                topic_placeholders[topic].markdown(f"### {topic}\n\n" + "\n\n".join(sections))
+                redraw(force=True)
+
+            elif kind == "summary_started":
+                report["started"] = True
+                redraw(force=True)
+
+            elif kind == "summary_token":
+                summary_parts.append(event["content"])
+                report["words"] += event["content"].count(" ")
+                redraw()
+
+            elif kind == "complete":
+                redraw(force=True)
+                progress_bar.progress(1.0)
+                status_text.text("📊 Finalizing analysis...")
+                return event["data"]
+
+            elif kind == "error":
+                st.markdown(f'<div class="custom-alert alert-error"> API Error ({event["status_code"]}): {event["detail"]}</div>', unsafe_allow_html=True)
+                return None
+
+    st.markdown('<div class="custom-alert alert-error"> The analysis stream ended unexpectedly.</div>', unsafe_allow_html=True)
+    return None
 
 
-def display_summary_results(summary_data):
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_summary(key: str, _summary_data: dict) -> dict:
+    """
+    Report HTML and both download artifacts for one analysis.
+
+    Cached by key, the payload's content hash, so widget reruns reuse them
+    instead of re-rendering and re-serializing the payload.
+    """
+    return {
+        "html": summary_to_html(_summary_data.get("summary", "")),
+        "json": export_json(_summary_data),
+        "text": export_text(_summary_data),
+        "word_count": len(_summary_data.get("summary", "").split())
+    }
+
+
+def display_summary_results(summary_data, key):
     """Display the structured summary results with enhanced styling"""
+    rendered = render_summary(key, summary_data)
     st.markdown("---")
     st.markdown("# Analysis Results")
     
@@ -497,63 +598,31 @@ def display_summary_results(summary_data):
             """, unsafe_allow_html=True)
         
         with col4:
-            word_count = len(summary_data.get("summary", "").split())
+            word_count = rendered["word_count"]
             st.markdown(f"""
             <div class="metric-card">
                 <div class="metric-value">{word_count}</div>
                 <div class="metric-label">Words Generated</div>
             </div>
             """, unsafe_allow_html=True)
-    
+
+    # Topics cut off by the backend's deadline are missing from the results
+    topic_status = summary_data.get("metadata", {}).get("topic_status", {})
+    timed_out = [
+        f"{topic} ({source})"
+        for topic, sources in topic_status.items()
+        for source, status in sources.items()
+        if status == "timeout"
+    ]
+    if timed_out:
+        st.markdown(f'<div class="custom-alert alert-warning"> Not finished in time and left out: {", ".join(timed_out)}</div>', unsafe_allow_html=True)
+
     # Enhanced summary display
     if "summary" in summary_data:
         st.markdown("## Comprehensive Summary")
         
-        # Clean and format the summary content
-        summary_content = summary_data["summary"]
-        
-        # Clean up the content by removing markdown formatting
-        import re
-        
-        # Remove bold markdown (**text**)
-        summary_content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', summary_content)
-        
-        # Remove italic markdown (*text*)
-        summary_content = re.sub(r'(?<!\*)\*(?!\*)([^*]+)\*(?!\*)', r'<em>\1</em>', summary_content)
-        
-        # Process bullet points
-        summary_content = re.sub(r'^\* ', '• ', summary_content, flags=re.MULTILINE)
-        
-        # Split into lines and process
-        lines = summary_content.split('\n')
-        processed_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('# '):
-                # Convert to HTML header
-                processed_lines.append(f"<h2 style='color: #2c3e50; margin-top: 2rem; margin-bottom: 1rem; font-weight: 700;'>{line[2:]}</h2>")
-            elif line.startswith('## '):
-                # Convert to HTML subheader
-                processed_lines.append(f"<h3 style='color: #34495e; margin-top: 1.5rem; margin-bottom: 0.8rem; font-weight: 600;'>{line[3:]}</h3>")
-            elif line.startswith('### '):
-                # Convert to HTML sub-subheader
-                processed_lines.append(f"<h4 style='color: #5a6c7d; margin-top: 1rem; margin-bottom: 0.5rem; font-weight: 500;'>{line[4:]}</h4>")
-            elif line.startswith('• '):
-                # Bullet point
-                processed_lines.append(f"<div style='margin-left: 1rem; margin-bottom: 0.5rem; line-height: 1.6;'><span style='color: #667eea; font-weight: bold;'>•</span> {line[2:]}</div>")
-            elif line and not line.startswith('#'):
-                # Regular paragraph
-                if line:  # Only add non-empty lines
-                    processed_lines.append(f"<p style='margin-bottom: 1rem; line-height: 1.8; text-align: justify;'>{line}</p>")
-        
-        formatted_summary = ''.join(processed_lines)
-        
-        # If no specific formatting was found, process as clean paragraphs
-        if not formatted_summary.strip():
-            paragraphs = summary_content.split('\n\n')
-            formatted_summary = ''.join([f"<p style='margin-bottom: 1rem; line-height: 1.8; text-align: justify;'>{p.strip()}</p>" for p in paragraphs if p.strip()])
-        
+        formatted_summary = rendered["html"]
+
         st.markdown(f"""
         <div class="summary-container">
             <div class="summary-text">{formatted_summary}</div>
@@ -575,7 +644,7 @@ def display_summary_results(summary_data):
         
         if st.download_button(
             " Download JSON",
-            data=json.dumps(summary_data, indent=2),
+            data=rendered["json"],
             file_name=filename,
             mime="application/json",
             type="primary"
@@ -583,22 +652,9 @@ def display_summary_results(summary_data):
             st.success("Analysis downloaded successfully!")
     
     with download_col3:
-        # Generate text version for download
-        text_content = f"""
-NewsNinja Analysis Report
-========================
-
-Generated: {summary_data.get('timestamp', 'N/A')}
-Topics: {', '.join(summary_data.get('topics', []))}
-Sources: {summary_data.get('source_type', 'N/A')}
-
-Summary:
-{summary_data.get('summary', 'N/A')}
-        """
-        
         if st.download_button(
             "Download Text",
-            data=text_content,
+            data=rendered["text"],
             file_name=f"newsninja_analysis_{timestamp}.txt",
             mime="text/plain",
             type="secondary"
@@ -1,7 +1,11 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 
 class NewsRequest(BaseModel):
     topics: List[str]
-    source_type: str
\ No newline at end of file
+    source_type: str
+    fields: Optional[List[str]] = None  # Top-level response fields to return; all when omitted
+    include_raw_data: bool = False
+    incremental: bool = False  # Summarize only headlines new since the topic's last run
+    deadline_seconds: Optional[float] = Field(None, gt=0)  # Time budget; slower topics are left out of the response
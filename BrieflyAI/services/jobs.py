@@ -0,0 +1,259 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from config import JOB_DB, JOB_WORKERS, JOB_QUEUE_SIZE
+from utils.cache import normalize_topic
+from utils.events import run_with_events
+from utils.shared_store import WORKER_ID, connect_sqlite, worker_alive
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+CANCEL_POLL_SECONDS = 2
+
+
+def make_job_key(request: Dict[str, Any]) -> str:
+    """
+    Identity of a job's work, used to coalesce identical submissions: the
+    whole request, so submissions that differ in any option (raw data,
+    fields, incremental, deadline) get their own job
+    """
+    normalized = dict(request, topics=[normalize_topic(topic) for topic in request["topics"]])
+    payload = json.dumps(normalized, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class JobStore:
+    """Persistent job table so results outlive the submitting request"""
+
+    def __init__(self, path: str = JOB_DB):
+        self._conn = connect_sqlite(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, job_key TEXT NOT NULL, status TEXT NOT NULL, "
+            "request TEXT NOT NULL, partial TEXT, result TEXT, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, worker TEXT)"
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "worker" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN worker TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (job_key, status)")
+        self._conn.commit()
+
+    def create(self, job_key: str, request: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO jobs (id, job_key, status, request, partial, created_at, updated_at, worker) "
+            "VALUES (?, ?, 'queued', ?, '{}', ?, ?, ?)",
+            (job_id, job_key, json.dumps(request), now, now, WORKER_ID)
+        )
+        self._conn.commit()
+        return job_id
+
+    def update(self, job_id: str, **fields: Any):
+        for name in ("partial", "result"):
+            if name in fields:
+                fields[name] = json.dumps(fields[name])
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for name in ("request", "partial", "result"):
+            job[name] = json.loads(job[name]) if job[name] else None
+        return job
+
+    def find_active(self, job_key: str) -> Optional[str]:
+        row = self._conn.execute(
+            f"SELECT id FROM jobs WHERE job_key = ? AND status IN {ACTIVE_STATUSES} "
+            "ORDER BY created_at DESC LIMIT 1",
+            (job_key,)
+        ).fetchone()
+        return row["id"] if row else None
+
+    def recover_interrupted(self) -> List[str]:
+        """
+        Jobs left active by a process that is no longer running: those that had
+        started are failed, those still queued are claimed for this worker and
+        returned in submission order so they can be queued again.
+        """
+        rows = self._conn.execute(
+            f"SELECT id, status, worker FROM jobs WHERE status IN {ACTIVE_STATUSES + ('cancelling',)} "
+            "ORDER BY created_at"
+        ).fetchall()
+        orphaned = [row for row in rows if not worker_alive(row["worker"])]
+        now = time.time()
+        self._conn.executemany(
+            "UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart', updated_at = ? WHERE id = ?",
+            [(now, row["id"]) for row in orphaned if row["status"] != "queued"]
+        )
+        claimed = []
+        for row in orphaned:
+            if row["status"] != "queued":
+                continue
+            # Another worker starting at the same time may claim it first
+            cursor = self._conn.execute(
+                "UPDATE jobs SET worker = ?, updated_at = ? WHERE id = ? AND status = 'queued' AND worker IS ?",
+                (WORKER_ID, now, row["id"], row["worker"])
+            )
+            if cursor.rowcount:
+                claimed.append(row["id"])
+        self._conn.commit()
+        return claimed
+
+    def cancel_requested(self, job_ids: List[str]) -> List[str]:
+        """Which of job_ids another worker has asked to cancel"""
+        if not job_ids:
+            return []
+        rows = self._conn.execute(
+            f"SELECT id FROM jobs WHERE status = 'cancelling' AND id IN ({', '.join('?' * len(job_ids))})",
+            job_ids
+        ).fetchall()
+        return [row["id"] for row in rows]
+
+
+class JobManager:
+    """
+    Bounded in-process worker pool for long analyses.
+
+    Identical in-flight submissions share one job. Partial results are
+    collected from pipeline events while the job runs. With several server
+    workers each runs its own pool over the shared job table; a cancel that
+    reaches another worker is flagged in the table and picked up by the owner.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        store: Optional[JobStore] = None,
+        workers: int = JOB_WORKERS,
+        queue_size: int = JOB_QUEUE_SIZE
+    ):
+        self.run_job = run_job
+        self.store = store or JobStore()
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._partial: Dict[str, Dict[str, Any]] = {}
+        self._stopping = False
+
+    async def start(self):
+        for job_id in self.store.recover_interrupted():
+            if self._queue.full():
+                self.store.update(job_id, status="failed", error="Job queue is full after server restart")
+            else:
+                self._queue.put_nowait(job_id)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._workers.append(asyncio.create_task(self._watch_cancellations()))
+
+    async def stop(self):
+        self._stopping = True
+        for task in list(self._running.values()) + self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def submit(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        job_key = make_job_key(request)
+        existing = self.store.find_active(job_key)
+        if existing:
+            return {"job_id": existing, "status": self.store.get(existing)["status"], "coalesced": True}
+
+        if self._queue.full():
+            raise HTTPException(status_code=503, detail="Job queue is full, please retry later")
+
+        job_id = self.store.create(job_key, request)
+        self._queue.put_nowait(job_id)
+        return {"job_id": job_id, "status": "queued", "coalesced": False}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get(job_id)
+        if job is not None and job_id in self._partial:
+            job["partial"] = self._partial[job_id]
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get(job_id)
+        if job is None or job["status"] not in ACTIVE_STATUSES:
+            return job
+
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+            job["status"] = "cancelling"
+            return job
+
+        if job["status"] == "running":
+            # Running in another worker process; its owner polls for this
+            self.store.update(job_id, status="cancelling")
+            return self.store.get(job_id)
+
+        # Still queued; the worker skips it when dequeued
+        self.store.update(job_id, status="cancelled")
+        return self.store.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self.store.get(job_id)
+                if job and job["status"] == "queued":
+                    await self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def _watch_cancellations(self):
+        while True:
+            await asyncio.sleep(CANCEL_POLL_SECONDS)
+            for job_id in self.store.cancel_requested(list(self._running)):
+                self._running[job_id].cancel()
+
+    async def _collect(self, job_id: str, events: asyncio.Queue):
+        partial = self._partial[job_id]
+        while True:
+            event = await events.get()
+            if event["event"] == "topic_analysis":
+                partial.setdefault(event["source"], {})[event["topic"]] = event["content"]
+                self.store.update(job_id, partial=partial)
+            elif event["event"] == "summary_token":
+                partial["summary"] = partial.get("summary", "") + event["content"]
+
+    async def _execute(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        self.store.update(job_id, status="running", worker=WORKER_ID)
+        self._partial[job_id] = {}
+
+        events = asyncio.Queue()
+        task = asyncio.create_task(run_with_events(events, self.run_job(job["request"])))
+        collector = asyncio.create_task(self._collect(job_id, events))
+        self._running[job_id] = task
+        try:
+            result = await task
+            self.store.update(job_id, status="completed", result=result, partial=self._partial[job_id])
+        except asyncio.CancelledError:
+            self.store.update(job_id, status="cancelled", partial=self._partial[job_id])
+            if self._stopping:
+                raise
+        except HTTPException as e:
+            self.store.update(job_id, status="failed", error=str(e.detail), partial=self._partial[job_id])
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            self.store.update(job_id, status="failed", error=str(e), partial=self._partial[job_id])
+        finally:
+            collector.cancel()
+            self._running.pop(job_id, None)
+            self._partial.pop(job_id, None)
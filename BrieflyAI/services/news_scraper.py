@@ -1,69 +1,214 @@
 import asyncio
-from typing import Dict, List
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
 
-from aiolimiter import AsyncLimiter
-from langchain_groq import ChatGroq
-from tenacity import retry, stop_after_attempt, wait_exponential
-from config import GROQ_API_KEY
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_not_exception_type
+from config import GROQ_API_KEY, DIGEST_MAX_UPDATES, HEDGE_ENABLED, BRIGHTDATA_MAX_THREADS, DEADLINE_SCRAPE_SHARE
 from utils.scraping import (
     generate_news_urls_to_scrape,
     scrape_with_brightdata,
-    clean_html_to_text,
-    extract_headlines
+    parse_headline_records,
+    format_headlines,
+    HeadlineRecord
 )
+from utils.dedup import dedupe_topic_headlines
 from utils.summarization import (
-    summarize_with_groq_structured
+    asummarize_with_groq_structured,
+    asummarize_headline_delta
 )
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from langchain_mcp_adapters.tools import load_mcp_tools
+from utils.digest import digest_store, headline_fingerprint, merge_digest
+from utils.archive import archive, ArticleRecord
+from utils.cache import scrape_cache
+from utils.events import emit_event
+from utils.metrics import observe_stage, acquire, count_retry
+from utils.deadline import DeadlineExceeded, deadline_scope, remaining, with_deadline
+from utils.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, hedged
+from utils.shared_store import make_rate_limiter
+
+logger = logging.getLogger(__name__)
+
 
 class NewsScraper:
-    _rate_limiter = AsyncLimiter(5, 1)  # 5 requests/second
+    _rate_limiter = make_rate_limiter("brightdata", 5, 1)  # 5 requests/second across all workers
+    _breaker = CircuitBreaker("brightdata")
+    _latency = LatencyTracker()
+    _executor = ThreadPoolExecutor(max_workers=BRIGHTDATA_MAX_THREADS, thread_name_prefix="brightdata")
+
+    async def _scrape_once(self, url: str) -> str:
+        # Off the event loop so topics run concurrently
+        start = time.perf_counter()
+        try:
+            html = await asyncio.get_running_loop().run_in_executor(self._executor, scrape_with_brightdata, url)
+        except asyncio.CancelledError:
+            # A hedged-away stall still tells us how slow requests are getting
+            self._latency.record(time.perf_counter() - start)
+            raise
+        self._latency.record(time.perf_counter() - start)
+        return html
+
+    async def _hedge(self, url: str) -> str:
+        # The duplicate is a real BrightData request, so it needs its own token
+        await acquire(self._rate_limiter, "brightdata")
+        return await self._scrape_once(url)
+
+    async def scrape_page(self, url: str, hedge: bool = HEDGE_ENABLED) -> str:
+        """
+        Scrape url through BrightData behind the circuit breaker. With hedge, a
+        duplicate request is sent once the first is slower than the recent p95.
+        """
+        await acquire(self._rate_limiter, "brightdata")
+        if not hedge:
+            return await self._breaker.call(lambda: self._scrape_once(url))
+        return await self._breaker.call(lambda: hedged(
+            lambda: self._scrape_once(url),
+            self._latency.hedge_delay(),
+            hedge_fn=lambda: self._hedge(url),
+            name="brightdata"
+        ))
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        # tenacity sees cancellation too; a cancelled fetch must not be retried
+        retry=retry_if_not_exception_type((CircuitOpenError, asyncio.CancelledError)),
+        reraise=True,
+        before_sleep=count_retry("news_fetch_topic")
     )
-    async def scrape_news(self, topics: List[str]) -> Dict[str, str]:
-        """Scrape and analyze news articles with structured summaries"""
+    async def _fetch_topic(self, topic: str) -> List[Dict[str, str]]:
+        """Scrape one topic's headline records; raises so failures are never cached"""
+        # Generate news URLs for the topic
+        urls = generate_news_urls_to_scrape([topic])
+
+        with observe_stage("scrape"):
+            search_html = await self.scrape_page(urls[topic])
+        with observe_stage("parse"):
+            records = parse_headline_records(search_html)
+        emit_event("topic_scraped", source="news", topic=topic, headline_count=len(records))
+        scraped_at = datetime.now(timezone.utc)
+        archive.submit("articles", [ArticleRecord.from_headline(topic, record, scraped_at) for record in records])
+        return [asdict(record) for record in records]
+
+    @retry(
+        stop=stop_after_attempt(2),
+        wait=wait_exponential(multiplier=1, min=1, max=5),
+        reraise=True,
+        before_sleep=count_retry("news_summarize")
+    )
+    async def _summarize(self, topic: str, records: List[HeadlineRecord]) -> str:
+        headlines = format_headlines(records)
+        if not headlines.strip():
+            return f"No headlines found for topic: {topic}"
+
+        # Generate structured summary using the updated function
+        with observe_stage("map_llm"):
+            summary = await asummarize_with_groq_structured(
+                api_key=GROQ_API_KEY,
+                headlines=headlines
+            )
+        return summary
+
+    async def _summarize_incremental(self, topic: str, records: List[HeadlineRecord]) -> Tuple[str, Dict[str, Any]]:
+        """Summarize only headlines not seen in the topic's last run and merge them into its digest"""
+        previous = digest_store.get(topic)
+        if previous is None or previous["updates"] >= DIGEST_MAX_UPDATES:
+            # No digest yet, or enough deltas stacked up that a fresh summary reads better
+            summary = await self._summarize(topic, records)
+            if records:
+                # Baseline for later incremental runs; full runs elsewhere leave the digest alone
+                digest_store.save(topic, [headline_fingerprint(record) for record in records], summary, updates=0)
+            return summary, {"mode": "full", "new_headlines": len(records), "total_headlines": len(records)}
+
+        seen = set(previous["fingerprints"])
+        fingerprints = [headline_fingerprint(record) for record in records]
+        new_records = [record for record, fingerprint in zip(records, fingerprints) if fingerprint not in seen]
+        info = {
+            "mode": "delta" if new_records else "unchanged",
+            "new_headlines": len(new_records),
+            "total_headlines": len(records),
+            "previous_run": datetime.fromtimestamp(previous["updated_at"]).isoformat()
+        }
+        if not new_records:
+            return previous["summary"], info
+
+        with observe_stage("map_llm"):
+            delta = await asummarize_headline_delta(
+                api_key=GROQ_API_KEY,
+                headlines=format_headlines(new_records)
+            )
+        summary = merge_digest(previous["summary"], delta)
+        digest_store.save(topic, previous["fingerprints"] + fingerprints, summary, updates=previous["updates"] + 1)
+        return summary, info
+
+    async def scrape_news(self, topics: List[str], incremental: bool = False) -> Dict[str, str]:
+        """
+        Scrape and analyze news articles with structured summaries.
+        With incremental, only headlines new since each topic's last run are summarized.
+
+        Topics still running when the request deadline passes are cancelled
+        and left out; status records "ok", "timeout" or "error" per topic.
+        """
         results = {}
         raw_headlines = {}  # Store raw headlines for debugging
-        
-        for topic in topics:
-            async with self._rate_limiter:
-                try:
-                    # Generate news URLs for the topic
-                    urls = generate_news_urls_to_scrape([topic])
-                    
-                    # Scrape the news page
-                    search_html = scrape_with_brightdata(urls[topic])
-                    clean_text = clean_html_to_text(search_html)
-                    headlines = extract_headlines(clean_text)
-                    
-                    # Store raw headlines for potential debugging
-                    raw_headlines[topic] = headlines
-                    
-                    # Generate structured summary using the updated function
-                    if headlines.strip():
-                        summary = summarize_with_groq_structured(
-                            api_key=GROQ_API_KEY,
-                            headlines=headlines
-                        )
-                        results[topic] = summary
-                    else:
-                        results[topic] = f"No headlines found for topic: {topic}"
-                        
-                except Exception as e:
-                    print(f"Error scraping news for topic '{topic}': {str(e)}")
-                    results[topic] = f"Error analyzing {topic}: {str(e)}"
-                
-                # Rate limiting to be respectful to news sites
-                await asyncio.sleep(1)
+        cache_info = {}
+        digest_info = {}
+        scraped = {}
+        status = {topic: "ok" for topic in topics}
+
+        async def fetch(topic: str):
+            try:
+                entry, cache_info[topic] = await with_deadline(scrape_cache.get_or_fetch(
+                    "news", topic, lambda: self._fetch_topic(topic)
+                ), "news_scrape")
+                scraped[topic] = [HeadlineRecord(**record) for record in entry]
+            except DeadlineExceeded:
+                status[topic] = "timeout"
+                cache_info[topic] = {"status": "timeout", "age_seconds": None}
+            except Exception as e:
+                status[topic] = "error"
+                logger.warning("Error scraping news", extra={"topic": topic, "error": str(e)})
+                results[topic] = f"Error analyzing {topic}: {str(e)}"
+                cache_info[topic] = {"status": "error", "age_seconds": None}
+
+        async def analyze(topic: str):
+            try:
+                raw_headlines[topic] = format_headlines(headlines[topic])
+                if incremental:
+                    results[topic], digest_info[topic] = await with_deadline(
+                        self._summarize_incremental(topic, headlines[topic]), "news_summary"
+                    )
+                else:
+                    results[topic] = await with_deadline(self._summarize(topic, headlines[topic]), "news_summary")
+                emit_event("topic_analysis", source="news", topic=topic, content=results[topic], cache=cache_info[topic])
+            except DeadlineExceeded:
+                status[topic] = "timeout"
+            except Exception as e:
+                status[topic] = "error"
+                logger.warning("Error analyzing news", extra={"topic": topic, "error": str(e)})
+                results[topic] = f"Error analyzing {topic}: {str(e)}"
+
+        # Scrape every topic concurrently; the rate limiter still paces BrightData.
+        # Deduplication waits for every scrape, so a stuck one may only use part of the time left.
+        with deadline_scope(remaining() * DEADLINE_SCRAPE_SHARE if remaining() is not None else None):
+            await asyncio.gather(*(fetch(topic) for topic in topics))
+
+        # Drop syndicated copies before paying for them in prompt tokens
+        headlines, dedup_stats = dedupe_topic_headlines(
+            {topic: scraped[topic] for topic in topics if topic in scraped}
+        )
+        await asyncio.gather(*(analyze(topic) for topic in headlines))
+        results = {topic: results[topic] for topic in topics if topic in results}
 
         return {
             "news_analysis": results,
             "raw_headlines": raw_headlines,  # Include raw data for debugging
+            "cache": cache_info,
+            "dedup": dedup_stats,
+            "digest": digest_info,
+            "status": status,
             "metadata": {
                 "total_topics": len(topics),
                 "successful_scrapes": len([r for r in results.values() if not r.startswith("Error")]),
@@ -73,38 +218,37 @@ class NewsScraper:
 
     @retry(
         stop=stop_after_attempt(2),
-        wait=wait_exponential(multiplier=1, min=1, max=5)
+        wait=wait_exponential(multiplier=1, min=1, max=5),
+        before_sleep=count_retry("scrape_single_topic")
     )
     async def scrape_single_topic(self, topic: str) -> Dict[str, str]:
         """Scrape a single topic for more focused analysis"""
         try:
-            async with self._rate_limiter:
-                urls = generate_news_urls_to_scrape([topic])
-                search_html = scrape_with_brightdata(urls[topic])
-                clean_text = clean_html_to_text(search_html)
-                headlines = extract_headlines(clean_text)
-                
-                if headlines.strip():
-                    summary = summarize_with_groq_structured(
-                        api_key=GROQ_API_KEY,
-                        headlines=headlines
-                    )
-                    return {
-                        "topic": topic,
-                        "summary": summary,
-                        "raw_headlines": headlines,
-                        "status": "success"
-                    }
-                else:
-                    return {
-                        "topic": topic,
-                        "summary": f"No current news found for: {topic}",
-                        "raw_headlines": "",
-                        "status": "no_data"
-                    }
-                    
+            entry, cache_info = await scrape_cache.get_or_fetch(
+                "news", topic, lambda: self._fetch_topic(topic)
+            )
+            headlines, _ = dedupe_topic_headlines({topic: [HeadlineRecord(**record) for record in entry]})
+            records = headlines[topic]
+
+            if records:
+                return {
+                    "topic": topic,
+                    "summary": await self._summarize(topic, records),
+                    "raw_headlines": format_headlines(records),
+                    "status": "success",
+                    "cache": cache_info
+                }
+            else:
+                return {
+                    "topic": topic,
+                    "summary": f"No current news found for: {topic}",
+                    "raw_headlines": "",
+                    "status": "no_data",
+                    "cache": cache_info
+                }
+
         except Exception as e:
-            print(f"Error in single topic scrape for '{topic}': {str(e)}")
+            logger.warning("Error in single topic scrape", extra={"topic": topic, "error": str(e)})
             return {
                 "topic": topic,
                 "summary": f"Error: {str(e)}",
@@ -112,6 +256,12 @@ class NewsScraper:
                 "status": "error"
             }
 
+    async def warm_topic(self, topic: str):
+        """Re-scrape topic into the cache and pre-compute its analysis for the LLM cache"""
+        entry = await scrape_cache.refresh("news", topic, lambda: self._fetch_topic(topic))
+        headlines, _ = dedupe_topic_headlines({topic: [HeadlineRecord(**record) for record in entry]})
+        await self._summarize(topic, headlines[topic])
+
     async def get_news_health_check(self) -> Dict[str, str]:
         """Test if news scraping is working properly"""
         test_topic = "technology"
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from config import GROQ_API_KEY, DEADLINE_REDUCE_SHARE
+from services.news_scraper import NewsScraper
+from services.reddit_scraper import scrape_reddit_topics
+from services.prewarm import prewarmer
+from utils.archive import archive, AnalysisRecord
+from utils.deadline import DeadlineExceeded, deadline_scope, with_deadline, remaining, budget
+from utils.events import emit_event, events_enabled
+from utils.metrics import observe_stage
+from utils.summarization import (
+    agenerate_structured_news_summary,
+    astream_structured_news_summary,
+    build_structured_news_prompt
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def map_stage(topics: List[str], source_type: str, incremental: bool = False) -> Dict[str, dict]:
+    """Run one analysis per (topic, source) concurrently"""
+    stages = {}
+    if source_type in ["news", "both"]:
+        stages["news"] = NewsScraper().scrape_news(topics, incremental=incremental)
+    if source_type in ["reddit", "both"]:
+        stages["reddit"] = scrape_reddit_topics(topics)
+
+    outputs = await asyncio.gather(*stages.values(), return_exceptions=True)
+
+    results = {}
+    for source, output in zip(stages, outputs):
+        if isinstance(output, asyncio.CancelledError):
+            # A branch cancelled on its own, e.g. by a deadline, while the map stage went on
+            logger.warning("%s scraping cancelled", source.title())
+            output = {"status": {topic: "timeout" for topic in topics}}
+        elif isinstance(output, Exception):
+            logger.warning("%s scraping error: %s", source.title(), output)
+            output = {}
+        elif isinstance(output, BaseException):
+            raise output
+        results[source] = output
+    archive.submit("analyses", fresh_analyses(topics, results))
+    return results
+
+
+def fresh_analyses(topics: List[str], results: Dict[str, dict]) -> List[AnalysisRecord]:
+    """Analyses made from newly scraped data; cached ones are already archived"""
+    analyzed_at = datetime.now(timezone.utc)
+    records = []
+    for source, data in results.items():
+        analyses = (data or {}).get(f"{source}_analysis", {})
+        for topic in topics:
+            if topic in analyses and data.get("cache", {}).get(topic, {}).get("status") == "miss":
+                records.append(AnalysisRecord(analyzed_at, topic, source, analyses[topic], data["status"][topic]))
+    return records
+
+
+def build_topic_sections(topics: List[str], news_data: dict, reddit_data: dict) -> Dict[str, str]:
+    """Compose per-topic sections straight from the map outputs"""
+    sections = {}
+    for topic in topics:
+        topic_news = news_data.get("news_analysis", {}).get(topic, "") if news_data else ""
+        topic_reddit = reddit_data.get("reddit_analysis", {}).get(topic, "") if reddit_data else ""
+
+        parts = []
+        if topic_news:
+            parts.append(f"## News Analysis\n\n{topic_news}")
+        if topic_reddit:
+            parts.append(f"## Reddit Discussions\n\n{topic_reddit}")
+        sections[topic] = "\n\n".join(parts) if parts else f"No data available for topic: {topic}"
+    return sections
+
+
+async def reduce_stage(topics: List[str], news_data: dict, reddit_data: dict) -> Tuple[str, dict]:
+    """Build the overall report from the map outputs with a single LLM call"""
+    user_prompt, prompt_stats = build_structured_news_prompt(news_data, reddit_data, topics)
+    try:
+        with observe_stage("reduce_llm"):
+            if events_enabled():
+                emit_event("summary_started")
+                parts = []
+                async for token in astream_structured_news_summary(
+                    api_key=GROQ_API_KEY,
+                    news_data=news_data,
+                    reddit_data=reddit_data,
+                    topics=topics,
+                    user_prompt=user_prompt
+                ):
+                    parts.append(token)
+                    emit_event("summary_token", content=token)
+                return "".join(parts), prompt_stats
+
+            summary = await agenerate_structured_news_summary(
+                api_key=GROQ_API_KEY,
+                news_data=news_data,
+                reddit_data=reddit_data,
+                topics=topics,
+                user_prompt=user_prompt
+            )
+        return summary, prompt_stats
+    except Exception as e:
+        logger.warning("Summary generation error: %s", e)
+        return "Summary generation failed. Please check the logs for more details.", prompt_stats
+
+
+def topic_status(topics: List[str], results: Dict[str, dict]) -> Dict[str, Dict[str, str]]:
+    """Per topic and source: "ok", "timeout" or "error" (also when a whole source failed)"""
+    return {
+        topic: {source: (data or {}).get("status", {}).get(topic, "error") for source, data in results.items()}
+        for topic in topics
+    }
+
+
+async def run_summary_pipeline(topics: List[str], source_type: str, incremental: bool = False) -> dict:
+    """
+    Map every (topic, source) pair to an analysis, then reduce them into one report.
+
+    Under a request deadline the map stage gets all but DEADLINE_REDUCE_SHARE
+    of the budget; topics not done by then are dropped so the report can still
+    be written from the rest. Returns the map outputs, the final summary,
+    per-topic status and per-stage timings.
+    """
+    start = time.perf_counter()
+    map_seconds = None
+    if remaining() is not None:
+        map_seconds = remaining() - budget() * DEADLINE_REDUCE_SHARE
+    with deadline_scope(map_seconds):
+        results = await map_stage(topics, source_type, incremental)
+    map_ms = (time.perf_counter() - start) * 1000
+    prewarmer.observe(topics, results)
+
+    news_data = results.get("news", {})
+    reddit_data = results.get("reddit", {})
+    status = topic_status(topics, results)
+
+    summary = None
+    prompt_stats = {}
+    report_status = "skipped"
+    reduce_ms = 0.0
+    if news_data or reddit_data:
+        reduce_start = time.perf_counter()
+        try:
+            summary, prompt_stats = await with_deadline(reduce_stage(topics, news_data, reddit_data), "reduce")
+            report_status = "ok"
+        except DeadlineExceeded:
+            summary = "The overall report could not be finished within the deadline. Topic analyses that finished are still included."
+            report_status = "timeout"
+        reduce_ms = (time.perf_counter() - reduce_start) * 1000
+        # Filed under each topic so a topic's history includes the reports it was part of
+        reported_at = datetime.now(timezone.utc)
+        archive.submit("analyses", [
+            AnalysisRecord(reported_at, topic, "report", summary, report_status) for topic in topics
+        ])
+
+    timed_out = report_status == "timeout" or any(
+        state == "timeout" for sources in status.values() for state in sources.values()
+    )
+    return {
+        "news": news_data,
+        "reddit": reddit_data,
+        "summary": summary,
+        "prompt": prompt_stats,
+        "status": status,
+        "deadline": {"seconds": budget(), "expired": timed_out, "report": report_status},
+        "timings": {
+            "map_ms": round(map_ms, 1),
+            "reduce_ms": round(reduce_ms, 1),
+            "total_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+    }
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from prometheus_client import Counter
+from config import (
+    PREWARM_WINDOW_SECONDS,
+    PREWARM_INTERVAL_SECONDS,
+    PREWARM_TOP_N,
+    PREWARM_MIN_REQUESTS,
+    PREWARM_BRIGHTDATA_BUDGET,
+    PREWARM_GROQ_BUDGET,
+    PREWARM_COSTS
+)
+from services.news_scraper import NewsScraper
+from services.reddit_scraper import warm_reddit_topic
+from utils.cache import scrape_cache, normalize_topic
+from utils.shared_store import Lease
+
+logger = logging.getLogger(__name__)
+
+PREWARM_LOOKUPS = Counter(
+    "briefly_prewarm_lookups_total",
+    "Topic lookups by whether they were served from a pre-warmed entry",
+    ["source", "outcome"]
+)
+PREWARM_REFRESHES = Counter(
+    "briefly_prewarm_refreshes_total",
+    "Topics refreshed ahead of time",
+    ["source", "status"]
+)
+
+
+class TopicPopularity:
+    """Sliding-window request counts per (source, normalized topic)"""
+
+    def __init__(self, window_seconds: int = PREWARM_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._requests: Dict[Tuple[str, str], Deque[float]] = {}
+        self._names: Dict[Tuple[str, str], str] = {}
+
+    def record(self, source: str, topic: str):
+        key = (source, normalize_topic(topic))
+        self._requests.setdefault(key, deque()).append(time.time())
+        self._names[key] = topic
+
+    def _prune(self):
+        cutoff = time.time() - self.window_seconds
+        for key in list(self._requests):
+            times = self._requests[key]
+            while times and times[0] < cutoff:
+                times.popleft()
+            if not times:
+                del self._requests[key]
+                del self._names[key]
+
+    def top(self, source: str, n: int, min_requests: int = 1) -> List[Tuple[str, int]]:
+        """Most requested topics for source as (topic, count), most popular first"""
+        self._prune()
+        counts = [
+            (self._names[key], len(times))
+            for key, times in self._requests.items()
+            if key[0] == source and len(times) >= min_requests
+        ]
+        return sorted(counts, key=lambda item: item[1], reverse=True)[:n]
+
+
+class PrewarmScheduler:
+    """
+    Refresh the most requested topics before their cache entries expire.
+
+    Each interval the top-N topics per source are refreshed if their entry is
+    missing or would expire before the next run, until the BrightData or Groq
+    budget for the interval is spent. Lookups served from a pre-warmed entry
+    are counted so the hit rate can be tuned against the spend.
+
+    With several server workers only the lease holder refreshes, so the budget
+    is spent once; it ranks topics by the requests it has served itself.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: int = PREWARM_INTERVAL_SECONDS,
+        top_n: int = PREWARM_TOP_N,
+        min_requests: int = PREWARM_MIN_REQUESTS,
+        budget: Optional[Dict[str, int]] = None
+    ):
+        self.interval_seconds = interval_seconds
+        self.top_n = top_n
+        self.min_requests = min_requests
+        self.budget = budget or {"brightdata": PREWARM_BRIGHTDATA_BUDGET, "groq": PREWARM_GROQ_BUDGET}
+        self.popularity = TopicPopularity()
+        self._lease = Lease("prewarm")
+        self._warmed: Set[Tuple[str, str]] = set()
+        self._task = None
+        self.stats = {
+            "runs": 0,
+            "skipped_not_leader": 0,
+            "refreshed": 0,
+            "failed": 0,
+            "skipped_budget": 0,
+            "lookups": 0,
+            "prewarmed_hits": 0
+        }
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def observe(self, topics: List[str], results: Dict[str, dict]):
+        """Count requested topics and whether each was served from a pre-warmed entry"""
+        for source, data in results.items():
+            cache_info = (data or {}).get("cache", {})
+            for topic in topics:
+                self.popularity.record(source, topic)
+                status = cache_info.get(topic, {}).get("status")
+                key = (source, normalize_topic(topic))
+                if status in ("hit", "stale") and key in self._warmed:
+                    outcome = "prewarmed"
+                    self.stats["prewarmed_hits"] += 1
+                else:
+                    outcome = "hit" if status in ("hit", "stale") else "miss"
+                    # Anything this request fetched itself replaces the warmed entry
+                    self._warmed.discard(key)
+                self.stats["lookups"] += 1
+                PREWARM_LOOKUPS.labels(source, outcome).inc()
+
+    def _due(self, source: str, topic: str) -> bool:
+        _, info = scrape_cache.lookup(source, topic)
+        if info["status"] == "miss":
+            return True
+        return info["age_seconds"] + self.interval_seconds > scrape_cache.ttl_seconds.get(source, 0)
+
+    async def _warm(self, source: str, topic: str):
+        if source == "news":
+            await NewsScraper().warm_topic(topic)
+        else:
+            await warm_reddit_topic(topic)
+
+    async def run_once(self):
+        """One pre-warm pass over the most popular topics within the budget"""
+        if not await self._lease.acquire(ttl_seconds=self.interval_seconds * 2):
+            self.stats["skipped_not_leader"] += 1
+            return
+        self.stats["runs"] += 1
+        remaining = dict(self.budget)
+        due = []
+        for source in PREWARM_COSTS:
+            for topic, _ in self.popularity.top(source, self.top_n, self.min_requests):
+                if self._due(source, topic):
+                    due.append((source, topic))
+
+        planned = []
+        for source, topic in due:
+            cost = PREWARM_COSTS[source]
+            if any(remaining[name] < amount for name, amount in cost.items()):
+                self.stats["skipped_budget"] += 1
+                continue
+            for name, amount in cost.items():
+                remaining[name] -= amount
+            planned.append((source, topic))
+
+        outcomes = await asyncio.gather(*(self._warm(source, topic) for source, topic in planned), return_exceptions=True)
+        for (source, topic), outcome in zip(planned, outcomes):
+            if isinstance(outcome, Exception):
+                self.stats["failed"] += 1
+                PREWARM_REFRESHES.labels(source, "failed").inc()
+                logger.warning("Pre-warm failed", extra={"source": source, "topic": topic, "error": str(outcome)})
+                continue
+            self._warmed.add((source, normalize_topic(topic)))
+            self.stats["refreshed"] += 1
+            PREWARM_REFRESHES.labels(source, "refreshed").inc()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Pre-warm pass failed")
+
+    @property
+    def hit_rate(self) -> float:
+        return self.stats["prewarmed_hits"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
+
+prewarmer = PrewarmScheduler()
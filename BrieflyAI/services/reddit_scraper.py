@@ -1,98 +1,412 @@
-from typing import List
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 import asyncio
-from datetime import datetime, timedelta
-from aiolimiter import AsyncLimiter
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from prometheus_client import Histogram
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from langchain_mcp_adapters.tools import load_mcp_tools
-from langgraph.prebuilt import create_react_agent
-from langchain_groq import ChatGroq
 from config import (
     TWO_WEEKS_AGO_STR,
     GROQ_API_KEY,
     BRIGHTDATA_API_KEY as API_TOKEN,
     WEB_UNLOCKER_ZONE,
-    DEEPSEEK
+    REDDIT_MODE,
+    REDDIT_MAX_AGE_DAYS,
+    REDDIT_MIN_SCORE,
+    REDDIT_MAX_POSTS,
+    REDDIT_SEARCH_RESULTS,
+    REDDIT_MAX_COMMENTS,
+    REDDIT_CONTEXT_BUDGET,
+    REDDIT_SEARCH_TOOL,
+    REDDIT_POST_TOOL,
+    REDDIT_FETCH_CONCURRENCY,
+    GROQ_TIMEOUT_SECONDS
 )
+from utils.archive import archive, PostRecord
+from utils.cache import scrape_cache, normalize_topic
+from utils.deadline import DeadlineExceeded, with_deadline
+from utils.events import emit_event
+from utils.metrics import observe_stage, rate_limited, count_retry, record_token_usage
+from utils.model_policy import MODEL_FALLBACK_CALLS, fallback_chain
+from utils.reddit_posts import extract_post_urls, parse_post_records, filter_posts, format_posts
+from utils.replay import cassette, replayable
+from utils.singleflight import singleflight
+from utils.shared_store import make_rate_limiter
+from utils.summarization import asummarize_reddit_posts, get_http_async_client
+
+if TYPE_CHECKING:
+    from langchain_groq import ChatGroq
+    from mcp import StdioServerParameters
 two_weeks_ago = datetime.today() - timedelta(days=14) 
 two_weeks_ago_str = two_weeks_ago.strftime('%Y-%m-%d')
 
+logger = logging.getLogger(__name__)
+
+REDDIT_MODES = ("agent", "pipeline")
+
+REDDIT_LLM_CALLS = Histogram(
+    "briefly_reddit_llm_calls",
+    "LLM round trips per Reddit topic analysis",
+    ["mode"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16)
+)
+REDDIT_TOKENS = Histogram(
+    "briefly_reddit_tokens",
+    "Groq tokens per Reddit topic analysis",
+    ["mode"],
+    buckets=(500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+)
+
 
 class MCPOverloadedError(Exception):
     pass
 
 
-mcp_limiter = AsyncLimiter(1, 15)
+mcp_limiter = make_rate_limiter("mcp", 1, 15)
+# mcp_limiter paces topic analyses; this bounds the post fetches each pipeline-mode analysis fans out
+mcp_fetch_slots = asyncio.Semaphore(REDDIT_FETCH_CONCURRENCY)
 
-# Initialize Groq model
-model = ChatGroq(
-    model=DEEPSEEK,
-    api_key=GROQ_API_KEY
-)
 
-# MCP server parameters
-server_params = StdioServerParameters(
-    command="npx",
-    env={
-        "API_TOKEN": API_TOKEN,
-        "WEB_UNLOCKER_ZONE": WEB_UNLOCKER_ZONE,
-    },
-    args=["@brightdata/mcp"],
-)
+@lru_cache(maxsize=None)
+def get_agent_model(model: str, max_retries: int = 2) -> "ChatGroq":
+    """Return a shared ChatGroq client for the Reddit agent"""
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(
+        model=model,
+        api_key=GROQ_API_KEY,
+        request_timeout=GROQ_TIMEOUT_SECONDS,
+        max_retries=max_retries,
+        http_async_client=get_http_async_client()
+    )
+
+
+@lru_cache(maxsize=1)
+def get_server_params() -> "StdioServerParameters":
+    """MCP server parameters, built on first use so importing this module does not load mcp"""
+    from mcp import StdioServerParameters
+
+    return StdioServerParameters(
+        command="npx",
+        env={
+            "API_TOKEN": API_TOKEN,
+            "WEB_UNLOCKER_ZONE": WEB_UNLOCKER_ZONE,
+        },
+        args=["@brightdata/mcp"],
+    )
+
+
+def _agent_messages(topic: str) -> list:
+    return [
+        {
+            "role": "system",
+            "content": f"""You are a Reddit analysis expert. Use available tools to:
+            1. Find top 2 posts about the given topic BUT only after {two_weeks_ago_str}, NOTHING before this date strictly!
+            2. Analyze their content and sentiment
+            3. Create a summary of discussions and overall sentiment"""
+        },
+        {
+            "role": "user",
+            "content": f"""Analyze Reddit posts about '{topic}'. 
+            Provide a comprehensive summary including:
+            - Main discussion points
+            - Key opinions expressed
+            - Any notable trends or patterns
+            - Summarize the overall narrative, discussion points and also quote interesting comments without mentioning names
+            - Overall sentiment (positive/neutral/negative)"""
+        }                   
+    ]
 
 
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=15, max=60),
     retry=retry_if_exception_type(MCPOverloadedError),
-    reraise=True
+    reraise=True,
+    before_sleep=count_retry("reddit_process_topic")
 )
-async def process_topic(agent, topic: str):
-    async with mcp_limiter:
-        messages = [
-            {
-                "role": "system",
-                "content": f"""You are a Reddit analysis expert. Use available tools to:
-                1. Find top 2 posts about the given topic BUT only after {two_weeks_ago_str}, NOTHING before this date strictly!
-                2. Analyze their content and sentiment
-                3. Create a summary of discussions and overall sentiment"""
-            },
-            {
-                "role": "user",
-                "content": f"""Analyze Reddit posts about '{topic}'. 
-                Provide a comprehensive summary including:
-                - Main discussion points
-                - Key opinions expressed
-                - Any notable trends or patterns
-                - Summarize the overall narrative, discussion points and also quote interesting comments without mentioning names
-                - Overall sentiment (positive/neutral/negative)"""
-            }                   
-        ]
-        
+async def process_topic(client, topic: str, mode: str = REDDIT_MODE) -> dict:
+    """
+    Analyze one topic with the ReAct agent or the direct tool pipeline.
+
+    client is a function returning the agent for a model in agent mode and
+    the MCP session in pipeline mode. Returns the summary as "content" with
+    the LLM round trips, tokens and latency it took; in agent mode "model"
+    is the model that answered.
+    """
+    async with rate_limited(mcp_limiter, "mcp"):
+        start = time.perf_counter()
         try:
-            response = await agent.ainvoke({"messages": messages})
-            return response["messages"][-1].content
+            if mode == "agent":
+                with observe_stage("mcp_agent"):
+                    analysis = await _invoke_agent_routed(client, topic)
+            else:
+                with observe_stage("reddit_pipeline"):
+                    analysis = await _run_pipeline(client, topic)
         except Exception as e:
             if "Overloaded" in str(e):
                 raise MCPOverloadedError("Service overloaded")
             else:
                 raise
 
+    REDDIT_LLM_CALLS.labels(mode).observe(analysis["llm_calls"])
+    REDDIT_TOKENS.labels(mode).observe(analysis["tokens"])
+    return {**analysis, "mode": mode, "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
 
 
-async def scrape_reddit_topics(topics: List[str]) -> dict[str, dict]:
-    """Process list of topics and return analysis results"""
-    async with stdio_client(server_params) as (read, write):
+async def _invoke_agent_routed(agent_for: Optional[Callable[[str], object]], topic: str) -> dict:
+    """Run the agent on the reddit_agent model, rebuilding it on the next fallback model after a 429"""
+    from groq import RateLimitError
+
+    chain = fallback_chain("reddit_agent")
+    for index, model in enumerate(chain):
+        # No agent is needed when the runs are replayed from a cassette
+        agent = agent_for(model) if agent_for is not None else None
+        try:
+            analysis = await _invoke_agent(agent, model, topic, _agent_messages(topic))
+        except RateLimitError:
+            if index == len(chain) - 1:
+                raise
+            logger.warning("Reddit agent rate limited, falling back", extra={"topic": topic, "model": model, "fallback": chain[index + 1]})
+            continue
+        if index > 0:
+            MODEL_FALLBACK_CALLS.labels("reddit_agent", model).inc()
+        return {**analysis, "model": model}
+
+
+@replayable("mcp_agent", key=lambda agent, model, topic, messages: [model, topic])
+async def _invoke_agent(agent, model: str, topic: str, messages: list) -> dict:
+    response = await agent.ainvoke({"messages": messages})
+    # Every AI message is one model round trip: tool calls and the final answer
+    llm_messages = [message for message in response["messages"] if message.type == "ai"]
+    for message in llm_messages:
+        record_token_usage(model, message)
+    return {
+        "content": response["messages"][-1].content,
+        "llm_calls": len(llm_messages),
+        "tokens": sum((message.usage_metadata or {}).get("total_tokens", 0) for message in llm_messages)
+    }
+
+
+@replayable("mcp_tool", key=lambda session, name, arguments: [name, arguments])
+async def _call_tool(session, name: str, arguments: dict) -> str:
+    result = await session.call_tool(name, arguments)
+    text = "\n".join(item.text for item in result.content if getattr(item, "text", None))
+    if result.isError:
+        raise RuntimeError(f"MCP tool {name} failed: {text[:200]}")
+    return text
+
+
+async def _fetch_post(session, url: str) -> str:
+    async with mcp_fetch_slots:
+        return await _call_tool(session, REDDIT_POST_TOOL, {"url": url})
+
+
+async def _run_pipeline(session, topic: str) -> dict:
+    """
+    Search, fetch and filter posts in code, then summarize them with one LLM call.
+
+    The date cutoff and score threshold are applied to the fetched post
+    records instead of being left to the prompt.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=REDDIT_MAX_AGE_DAYS)
+    with observe_stage("mcp_search"):
+        results = await _call_tool(session, REDDIT_SEARCH_TOOL, {
+            "query": f"site:reddit.com {topic} after:{since:%Y-%m-%d}",
+            "engine": "google"
+        })
+    urls = extract_post_urls(results, REDDIT_SEARCH_RESULTS)
+
+    with observe_stage("mcp_scrape"):
+        payloads = await asyncio.gather(*(_fetch_post(session, url) for url in urls), return_exceptions=True)
+    failures = [payload for payload in payloads if isinstance(payload, Exception)]
+    if failures and len(failures) == len(payloads):
+        raise failures[0]
+    for url, payload in zip(urls, payloads):
+        if isinstance(payload, Exception):
+            logger.warning("Reddit post fetch failed", extra={"topic": topic, "url": url, "error": str(payload)})
+
+    posts = [post for payload in payloads if not isinstance(payload, Exception) for post in parse_post_records(payload)]
+    selected = filter_posts(posts, since, REDDIT_MIN_SCORE, REDDIT_MAX_POSTS)
+    logger.info(
+        "Reddit posts filtered",
+        extra={"topic": topic, "candidates": len(urls), "posts": len(posts), "selected": len(selected)}
+    )
+    emit_event("topic_scraped", source="reddit", topic=topic, post_count=len(selected))
+    scraped_at = datetime.now(timezone.utc)
+    archive.submit("posts", [PostRecord.from_post(topic, post, scraped_at) for post in posts])
+    if not selected:
+        return {
+            "content": f"No Reddit posts about '{topic}' since {since:%Y-%m-%d} with at least {REDDIT_MIN_SCORE} upvotes were found.",
+            "llm_calls": 0,
+            "tokens": 0
+        }
+
+    content, tokens = await asummarize_reddit_posts(
+        GROQ_API_KEY, topic, format_posts(selected, REDDIT_CONTEXT_BUDGET, REDDIT_MAX_COMMENTS)
+    )
+    return {"content": content, "llm_calls": 1, "tokens": tokens}
+
+
+async def analyze_reddit_topics(
+    topics: List[str],
+    mode: str = REDDIT_MODE,
+    on_result: Optional[Callable[[str, dict], None]] = None,
+    on_error: Optional[Callable[[str, Exception], None]] = None
+) -> Dict[str, dict]:
+    """
+    Analyze topics within a single MCP session, see process_topic for the
+    result per topic. on_result is called with each topic's result as soon
+    as it is ready. Without on_error the first failed topic fails the whole
+    call; with it, a failed topic is reported there and left out.
+    """
+    if mode not in REDDIT_MODES:
+        raise ValueError(f"Unknown REDDIT_MODE: {mode}")
+    if cassette.replaying:
+        # Recorded agent runs and tool calls need no MCP server
+        return await _analyze(None, topics, mode, on_result, on_error)
+
+    # MCP, its LangChain adapters and LangGraph are only needed once a live session starts
+    from mcp import ClientSession
+    from mcp.client.stdio import stdio_client
+    from langchain_mcp_adapters.tools import load_mcp_tools
+    from langgraph.prebuilt import create_react_agent
+
+    async with stdio_client(get_server_params()) as (read, write):
         async with ClientSession(read, write) as session:
             await session.initialize()
+            if mode == "pipeline":
+                return await _analyze(session, topics, mode, on_result, on_error)
             tools = await load_mcp_tools(session)
-            agent = create_react_agent(model, tools)
-            
-            reddit_results = {}
-            for topic in topics:
-                summary = await process_topic(agent, topic)
-                reddit_results[topic] = summary
-                await asyncio.sleep(5)  # Maintain rate limiting
-                
-            return {"reddit_analysis": reddit_results}
\ No newline at end of file
+            chain = fallback_chain("reddit_agent")
+            agents = {}
+
+            def agent_for(model: str):
+                # Only the last model in the chain waits out 429s with client retries; the others hand over at once
+                if model not in agents:
+                    agents[model] = create_react_agent(get_agent_model(model, 2 if model == chain[-1] else 0), tools)
+                return agents[model]
+
+            return await _analyze(agent_for, topics, mode, on_result, on_error)
+
+
+async def _analyze(
+    client,
+    topics: List[str],
+    mode: str,
+    on_result: Optional[Callable[[str, dict], None]],
+    on_error: Optional[Callable[[str, Exception], None]] = None
+) -> Dict[str, dict]:
+    # One analysis per topic over the shared session; mcp_limiter paces them
+    async def analyze(topic: str) -> Optional[dict]:
+        try:
+            analysis = await process_topic(client, topic, mode)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(topic, e)
+            return None
+        emit_event("topic_analysis", source="reddit", topic=topic, content=analysis["content"])
+        if on_result is not None:
+            on_result(topic, analysis)
+        return analysis
+
+    analyses = await asyncio.gather(*(analyze(topic) for topic in topics))
+    return {topic: analysis for topic, analysis in zip(topics, analyses) if analysis is not None}
+
+
+async def _analyze_single_topic(topic: str) -> str:
+    results = await analyze_reddit_topics([topic])
+    return results[topic]["content"]
+
+
+async def warm_reddit_topic(topic: str):
+    """Re-run the Reddit analysis for topic into the cache"""
+    await scrape_cache.refresh("reddit", topic, lambda: _analyze_single_topic(topic))
+
+
+async def scrape_reddit_topics(topics: List[str]) -> dict[str, dict]:
+    """
+    Process list of topics and return analysis results.
+
+    Topics still running when the request deadline passes or whose analysis
+    failed are left out; status records "ok", "timeout" or "error" per topic.
+    """
+    cached = {}
+    cache_info = {}
+    status = {topic: "ok" for topic in topics}
+    missing = []
+
+    for topic in topics:
+        summary, cache_info[topic] = scrape_cache.lookup("reddit", topic)
+        if summary is None:
+            missing.append(topic)
+            continue
+        cached[topic] = summary
+        emit_event("topic_analysis", source="reddit", topic=topic, content=summary, cache=cache_info[topic])
+        if cache_info[topic]["status"] == "stale":
+            scrape_cache.revalidate("reddit", topic, lambda topic=topic: _analyze_single_topic(topic))
+
+    if missing:
+        # Topics another request is already analyzing are awaited, the rest share one MCP session
+        keys = {topic: normalize_topic(topic) for topic in missing}
+        coalesced = {topic: singleflight.in_flight("reddit", keys[topic]) for topic in missing}
+        leaders = [topic for topic in missing if not coalesced[topic]]
+
+        # Each leader resolves as soon as its own analysis is done, not when the whole batch is
+        loop = asyncio.get_running_loop()
+        analyses = {topic: loop.create_future() for topic in leaders}
+
+        def resolve(topic: str, analysis: dict):
+            if not analyses[topic].done():
+                analyses[topic].set_result(analysis)
+
+        def fail(topic: str, error: Exception):
+            if not analyses[topic].done():
+                analyses[topic].set_exception(error)
+
+        def settle(batch: asyncio.Future):
+            for future in analyses.values():
+                if future.done():
+                    continue
+                if batch.cancelled():
+                    future.cancel()
+                elif batch.exception() is not None:
+                    future.set_exception(batch.exception())
+
+        batch = None
+        if leaders:
+            batch = asyncio.ensure_future(analyze_reddit_topics(leaders, on_result=resolve, on_error=fail))
+            batch.add_done_callback(settle)
+
+        async def lead(topic: str) -> str:
+            try:
+                summary = (await analyses[topic])["content"]
+            finally:
+                # Stop the MCP session once every topic it is still working on has been abandoned
+                pending = [future for future in analyses.values() if not future.done()]
+                if not pending and any(future.cancelled() for future in analyses.values()):
+                    batch.cancel()
+            scrape_cache.store("reddit", topic, summary)
+            return summary
+
+        flights = [singleflight.do("reddit", keys[topic], lambda topic=topic: lead(topic)) for topic in missing]
+        outcomes = await asyncio.gather(*(with_deadline(flight, "reddit") for flight in flights), return_exceptions=True)
+        for topic, outcome in zip(missing, outcomes):
+            if isinstance(outcome, DeadlineExceeded):
+                status[topic] = "timeout"
+                cache_info[topic] = {"status": "timeout", "age_seconds": None}
+                continue
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            if isinstance(outcome, Exception):
+                status[topic] = "error"
+                logger.warning("Error analyzing Reddit", extra={"topic": topic, "error": str(outcome)})
+                cache_info[topic] = {"status": "error", "age_seconds": None}
+                continue
+            cached[topic] = outcome
+            cache_info[topic] = {"status": "miss", "age_seconds": 0.0, "coalesced": coalesced[topic]}
+
+    reddit_results = {topic: cached[topic] for topic in topics if topic in cached}
+    return {"reddit_analysis": reddit_results, "cache": cache_info, "status": status}
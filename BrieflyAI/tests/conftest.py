@@ -0,0 +1,13 @@
+import os
+import sys
+
+# Modules import each other as top-level names ("from config import ..."), as when run from BrieflyAI
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep test runs out of the persistent caches, job table, digests and archive
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("REPLAY_MODE", "off")
+os.environ.setdefault("LLM_CACHE_DB", "")
+os.environ.setdefault("ARCHIVE_DIR", "")
+os.environ.setdefault("JOB_DB", ":memory:")
+os.environ.setdefault("DIGEST_DB", ":memory:")
@@ -0,0 +1,30 @@
+import asyncio
+import time
+
+from utils.cache import ScrapeCache
+
+
+def test_stale_revalidation_joins_a_refresh_in_flight():
+    cache = ScrapeCache(ttl_seconds={"news": 0}, stale_seconds=60, db_path=None)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "fresh"
+
+    async def scenario():
+        cache.store("news", "Stale topic", "old")
+        time.sleep(0.01)  # Past the zero TTL, inside the stale window
+        prewarm = asyncio.create_task(cache.refresh("news", "Stale topic", fetch))
+        await asyncio.sleep(0)
+
+        value, info = await cache.get_or_fetch("news", "  stale TOPIC ", fetch)
+        assert (value, info["status"]) == ("old", "stale")
+        await prewarm
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert calls == 1
+    assert cache.lookup("news", "Stale topic")[0] == "fresh"
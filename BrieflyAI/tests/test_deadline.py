@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from utils.deadline import DeadlineExceeded, budget, deadline_scope, remaining, with_deadline
+
+
+def test_no_deadline_by_default():
+    assert remaining() is None
+    assert budget() is None
+    assert asyncio.run(with_deadline(asyncio.sleep(0, result="done"), "test")) == "done"
+
+
+def test_nested_scope_cannot_extend_the_deadline():
+    with deadline_scope(1):
+        with deadline_scope(60):
+            assert remaining() <= 1
+            assert budget() == 1
+        with deadline_scope(None):
+            assert budget() == 1
+
+
+def test_nested_scope_can_shorten_the_deadline():
+    with deadline_scope(60):
+        with deadline_scope(0.5):
+            assert remaining() <= 0.5
+            assert budget() == 0.5
+        assert remaining() > 0.5
+        assert budget() == 60
+    assert remaining() is None
+
+
+def test_with_deadline_cancels_work_past_the_tighter_budget():
+    cancelled = False
+
+    async def slow():
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    async def scenario():
+        with deadline_scope(60):
+            with deadline_scope(0.02):
+                with pytest.raises(DeadlineExceeded):
+                    await with_deadline(slow(), "test")
+
+    asyncio.run(scenario())
+    assert cancelled
+
+
+def test_tasks_inherit_the_deadline():
+    async def child():
+        return budget()
+
+    async def scenario():
+        with deadline_scope(5):
+            return await asyncio.create_task(child())
+
+    assert asyncio.run(scenario()) == 5
+
+
+def test_timeouts_raised_by_the_work_are_not_deadline_expiry():
+    async def times_out():
+        raise asyncio.TimeoutError("upstream timeout")
+
+    async def scenario():
+        with deadline_scope(60):
+            await with_deadline(times_out(), "test")
+
+    with pytest.raises(asyncio.TimeoutError) as raised:
+        asyncio.run(scenario())
+    assert not isinstance(raised.value, DeadlineExceeded)
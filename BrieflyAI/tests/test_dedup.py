@@ -0,0 +1,71 @@
+from utils.dedup import dedupe_topic_headlines
+from utils.scraping import HeadlineRecord
+
+
+def _records(*titles):
+    return [HeadlineRecord(title=title) for title in titles]
+
+
+def _titles(records):
+    return [record.title for record in records]
+
+
+def test_syndicated_copies_merge():
+    headlines = {"AI": _records(
+        "OpenAI unveils GPT-5 with stronger reasoning - Reuters",
+        "OpenAI unveils GPT-5 with stronger reasoning | The Verge",
+        "OpenAI Unveils GPT-5, With Stronger Reasoning - CNBC",
+    )}
+    deduped, stats = dedupe_topic_headlines(headlines, across_topics=False)
+    assert len(deduped["AI"]) == 1
+    assert deduped["AI"][0].count == 3
+    assert stats["exact_duplicates"] == 2
+
+
+def test_reworded_copy_merges():
+    headlines = {"Economy": _records(
+        "Federal Reserve holds interest rates steady as inflation cools",
+        "Federal Reserve holds interest rates steady while inflation cools",
+    )}
+    deduped, stats = dedupe_topic_headlines(headlines, across_topics=False)
+    assert len(deduped["Economy"]) == 1
+    assert stats["near_duplicates"] == 1
+
+
+def test_near_miss_headlines_stay_separate():
+    pairs = [
+        ("Trump signs executive order on AI", "Trump signs executive order on tariffs"),
+        ("Apple shares rise after earnings beat", "Apple shares fall after earnings miss"),
+        ("Tesla recalls 2 million vehicles over Autopilot", "Tesla recalls 120,000 vehicles over door latches"),
+        ("Fed raises rates by a quarter point", "ECB raises rates by a quarter point"),
+        ("Storm hits Florida coast", "Storm hits Texas coast"),
+    ]
+    for first, second in pairs:
+        deduped, stats = dedupe_topic_headlines({"News": _records(first, second)}, across_topics=False)
+        assert _titles(deduped["News"]) == [first, second]
+        assert stats["near_duplicates"] == 0
+
+
+def test_cross_topic_needs_a_very_close_match():
+    headlines = {
+        "AI": _records("Nvidia posts record revenue on AI chip demand - Reuters", "Trump signs executive order on AI"),
+        "Politics": _records(
+            "Nvidia posts record revenue on AI chip demand - Bloomberg",
+            "Trump signs executive order on tariffs",
+        ),
+    }
+    deduped, _ = dedupe_topic_headlines(headlines, across_topics=True)
+    assert _titles(deduped["Politics"]) == ["Trump signs executive order on tariffs"]
+    assert deduped["AI"][0].count == 2
+
+
+def test_cross_topic_never_empties_a_topic():
+    headlines = {
+        "AI": _records("Nvidia posts record revenue on AI chip demand - Reuters"),
+        "Semiconductors": _records("Nvidia posts record revenue on AI chip demand - Bloomberg"),
+    }
+    deduped, stats = dedupe_topic_headlines(headlines, across_topics=True)
+    assert _titles(deduped["Semiconductors"]) == ["Nvidia posts record revenue on AI chip demand - Bloomberg"]
+    assert deduped["AI"][0].count == 1
+    assert stats["exact_duplicates"] == 0
+    assert stats["prompt_tokens_after"] <= stats["prompt_tokens_before"]
@@ -0,0 +1,65 @@
+import asyncio
+import socket
+
+import pytest
+
+from models import NewsRequest
+from services.jobs import JobManager, JobStore, make_job_key
+
+
+async def _never_run(request):
+    raise AssertionError("workers are not started in these tests")
+
+
+def _request(**options):
+    return NewsRequest(topics=["Artificial Intelligence", "Climate"], source_type="news", **options).model_dump()
+
+
+def test_job_key_ignores_topic_spelling():
+    first = NewsRequest(topics=["Artificial Intelligence"], source_type="news").model_dump()
+    second = NewsRequest(topics=["  artificial   intelligence "], source_type="news").model_dump()
+    assert make_job_key(first) == make_job_key(second)
+
+
+@pytest.mark.parametrize("options", [
+    {"include_raw_data": True},
+    {"fields": ["summary"]},
+    {"incremental": True},
+    {"deadline_seconds": 30},
+])
+def test_requests_differing_in_options_get_their_own_job(options):
+    manager = JobManager(_never_run, store=JobStore(":memory:"))
+    plain = manager.submit(_request())
+    variant = manager.submit(_request(**options))
+    assert make_job_key(_request()) != make_job_key(_request(**options))
+    assert variant["job_id"] != plain["job_id"]
+    assert not variant["coalesced"]
+
+    assert manager.submit(_request(**options))["job_id"] == variant["job_id"]
+
+
+def test_restart_requeues_queued_jobs_and_fails_running_ones():
+    store = JobStore(":memory:")
+    dead_worker = f"{socket.gethostname()}:999999999"
+    queued = store.create("queued-key", _request())
+    running = store.create("running-key", _request(incremental=True))
+    store.update(queued, worker=dead_worker)
+    store.update(running, status="running", worker=dead_worker)
+
+    async def run_job(request):
+        return {"summary": f"Digest of {len(request['topics'])} topics"}
+
+    async def restart():
+        manager = JobManager(run_job, store=store)
+        await manager.start()
+        for _ in range(100):
+            if store.get(queued)["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+        await manager.stop()
+
+    asyncio.run(restart())
+    assert store.get(queued)["status"] == "completed"
+    assert store.get(queued)["result"] == {"summary": "Digest of 2 topics"}
+    assert store.get(running)["status"] == "failed"
+    assert store.get(running)["error"] == "Interrupted by server restart"
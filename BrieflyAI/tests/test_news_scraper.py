@@ -0,0 +1,53 @@
+import asyncio
+from dataclasses import asdict
+
+import pytest
+
+from services import news_scraper
+from services.news_scraper import NewsScraper
+from utils.digest import digest_store, headline_fingerprint
+from utils.scraping import HeadlineRecord
+
+HEADLINES = [
+    HeadlineRecord(title="Senate passes climate bill after overnight session"),
+    HeadlineRecord(title="Heatwave breaks records across southern Europe"),
+]
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    async def fetch_topic(self, topic):
+        return [asdict(record) for record in HEADLINES]
+
+    async def summarize(api_key, headlines):
+        return "Full summary"
+
+    monkeypatch.setattr(NewsScraper, "_fetch_topic", fetch_topic)
+    monkeypatch.setattr(news_scraper, "asummarize_with_groq_structured", summarize)
+    return NewsScraper()
+
+
+def test_full_run_leaves_the_incremental_digest_alone(scraper):
+    topic = "Climate digest untouched"
+    digest_store.save(topic, [headline_fingerprint(HEADLINES[0])], "Accumulated digest", updates=3)
+
+    result = asyncio.run(scraper.scrape_news([topic], incremental=False))
+    asyncio.run(scraper.scrape_single_topic(topic))
+    asyncio.run(scraper.warm_topic(topic))
+
+    assert result["news_analysis"][topic] == "Full summary"
+    digest = digest_store.get(topic)
+    assert digest["summary"] == "Accumulated digest"
+    assert digest["updates"] == 3
+    assert digest["fingerprints"] == [headline_fingerprint(HEADLINES[0])]
+
+
+def test_first_incremental_run_saves_the_baseline(scraper):
+    topic = "Climate digest baseline"
+    result = asyncio.run(scraper.scrape_news([topic], incremental=True))
+
+    assert result["digest"][topic]["mode"] == "full"
+    digest = digest_store.get(topic)
+    assert digest["summary"] == "Full summary"
+    assert digest["updates"] == 0
+    assert digest["fingerprints"] == [headline_fingerprint(record) for record in HEADLINES]
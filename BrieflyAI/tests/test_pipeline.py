@@ -0,0 +1,23 @@
+import asyncio
+
+from services import pipeline
+from services.news_scraper import NewsScraper
+from services.pipeline import build_topic_sections, map_stage, topic_status
+
+
+def test_cancelled_source_is_reported_as_timed_out(monkeypatch):
+    async def scrape_news(self, topics, incremental=False):
+        return {"news_analysis": {topic: f"News on {topic}" for topic in topics}, "status": {topic: "ok" for topic in topics}}
+
+    async def scrape_reddit_topics(topics):
+        raise asyncio.CancelledError()
+
+    monkeypatch.setattr(NewsScraper, "scrape_news", scrape_news)
+    monkeypatch.setattr(pipeline, "scrape_reddit_topics", scrape_reddit_topics)
+
+    topics = ["Elections"]
+    results = asyncio.run(map_stage(topics, "both"))
+
+    assert topic_status(topics, results) == {"Elections": {"news": "ok", "reddit": "timeout"}}
+    sections = build_topic_sections(topics, results["news"], results["reddit"])
+    assert sections["Elections"] == "## News Analysis\n\nNews on Elections"
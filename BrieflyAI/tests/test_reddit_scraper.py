@@ -0,0 +1,87 @@
+import asyncio
+
+from services import reddit_scraper
+from services.pipeline import topic_status
+
+
+def test_failed_topic_does_not_fail_the_others(monkeypatch):
+    async def process_topic(client, topic, mode):
+        if topic == "Broken topic":
+            raise RuntimeError("MCP tool search_engine failed")
+        return {"content": f"Reddit on {topic}", "llm_calls": 1, "tokens": 100, "mode": mode, "latency_ms": 1.0}
+
+    async def analyze_reddit_topics(topics, mode="pipeline", on_result=None, on_error=None):
+        return await reddit_scraper._analyze(None, topics, mode, on_result, on_error)
+
+    monkeypatch.setattr(reddit_scraper, "process_topic", process_topic)
+    monkeypatch.setattr(reddit_scraper, "analyze_reddit_topics", analyze_reddit_topics)
+
+    topics = ["Working topic", "Broken topic"]
+    result = asyncio.run(reddit_scraper.scrape_reddit_topics(topics))
+
+    assert result["reddit_analysis"] == {"Working topic": "Reddit on Working topic"}
+    assert result["status"] == {"Working topic": "ok", "Broken topic": "error"}
+    assert result["cache"]["Broken topic"]["status"] == "error"
+    assert topic_status(topics, {"reddit": result}) == {
+        "Working topic": {"reddit": "ok"},
+        "Broken topic": {"reddit": "error"},
+    }
+
+
+def test_agent_falls_back_to_the_next_model_after_a_429():
+    import httpx
+    from groq import RateLimitError
+    from langchain_core.messages import AIMessage
+    from utils.model_policy import fallback_chain
+
+    chain = fallback_chain("reddit_agent")
+    built = []
+
+    class Agent:
+        def __init__(self, model):
+            self.model = model
+
+        async def ainvoke(self, state):
+            if self.model == chain[0]:
+                response = httpx.Response(429, request=httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions"))
+                raise RateLimitError("Rate limit reached", response=response, body=None)
+            return {"messages": [AIMessage(content=f"Answered by {self.model}")]}
+
+    def agent_for(model):
+        built.append(model)
+        return Agent(model)
+
+    analysis = asyncio.run(reddit_scraper._invoke_agent_routed(agent_for, "Climate"))
+
+    assert len(chain) > 1
+    assert built == chain[:2]
+    assert analysis["model"] == chain[1]
+    assert analysis["content"] == f"Answered by {chain[1]}"
+
+
+def test_post_fetches_are_bounded():
+    from types import SimpleNamespace
+
+    from config import REDDIT_FETCH_CONCURRENCY
+
+    in_flight = 0
+    peak = 0
+
+    class Session:
+        async def call_tool(self, name, arguments):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return SimpleNamespace(content=[SimpleNamespace(text=arguments["url"])], isError=False)
+
+    async def fetch_all():
+        session = Session()
+        urls = [f"https://www.reddit.com/r/news/comments/{i}" for i in range(8)]
+        return await asyncio.gather(*(reddit_scraper._fetch_post(session, url) for url in urls))
+
+    payloads = asyncio.run(fetch_all())
+
+    assert len(payloads) == 8
+    assert peak == REDDIT_FETCH_CONCURRENCY
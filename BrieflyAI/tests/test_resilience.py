@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, hedged
+
+
+async def _fail():
+    raise ConnectionError("BrightData unreachable")
+
+
+async def _succeed():
+    return "page"
+
+
+def test_breaker_opens_after_consecutive_failures_and_fails_fast():
+    breaker = CircuitBreaker("test-open", failure_threshold=3, reset_seconds=60)
+    calls = 0
+
+    async def counted():
+        nonlocal calls
+        calls += 1
+        return await _fail()
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                await breaker.call(counted)
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(counted)
+
+    asyncio.run(scenario())
+    assert calls == 3
+
+
+def test_breaker_lets_one_trial_through_when_half_open():
+    breaker = CircuitBreaker("test-half-open", failure_threshold=1, reset_seconds=0.01)
+    release = None
+
+    async def trial():
+        await release.wait()
+        return "page"
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        with pytest.raises(ConnectionError):
+            await breaker.call(_fail)
+        time.sleep(0.02)
+        assert breaker.state == "half_open"
+
+        first = asyncio.ensure_future(breaker.call(trial))
+        await asyncio.sleep(0)
+        # Only one trial at a time while the dependency may still be down
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(_succeed)
+        release.set()
+        assert await first == "page"
+        assert breaker.state == "closed"
+        assert breaker.failures == 0
+
+    asyncio.run(scenario())
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker("test-reopen", failure_threshold=2, reset_seconds=0.01)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breaker.call(_fail)
+        time.sleep(0.02)
+        with pytest.raises(ConnectionError):
+            await breaker.call(_fail)
+        assert breaker.state == "open"
+        time.sleep(0.02)
+        assert await breaker.call(_succeed) == "page"
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_hedge_wins_over_a_stalled_call():
+    started = []
+    stalled = None
+
+    async def request():
+        nonlocal stalled
+        started.append(time.perf_counter())
+        if len(started) == 1:
+            stalled = asyncio.current_task()
+            await asyncio.sleep(10)
+            return "stalled page"
+        return "hedged page"
+
+    async def scenario():
+        start = time.perf_counter()
+        result = await hedged(request, delay=0.02, name="test")
+        await asyncio.sleep(0)
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == "hedged page"
+    assert len(started) == 2
+    assert started[1] - started[0] >= 0.02
+    assert elapsed < 1
+    assert stalled.cancelled()
+
+
+def test_no_hedge_for_a_fast_call():
+    calls = 0
+
+    async def request():
+        nonlocal calls
+        calls += 1
+        return "page"
+
+    assert asyncio.run(hedged(request, delay=0.05, name="test")) == "page"
+    assert calls == 1
+
+
+def test_hedge_delay_follows_recent_latency():
+    tracker = LatencyTracker(window=100)
+    initial = tracker.hedge_delay()
+    for i in range(100):
+        tracker.record(1 + i / 100)
+
+    assert initial > 0
+    assert tracker.hedge_delay() == pytest.approx(tracker.percentile(0.95))
+    assert 1.9 <= tracker.hedge_delay() <= 2.0
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_result():
+    flights = SingleFlight(bucket_seconds=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "headlines"
+
+    async def callers():
+        first = flights.do("news", "climate", fetch)
+        assert flights.in_flight("news", "climate")
+        second = flights.do("news", "climate", fetch)
+        third = flights.do("news", "climate", fetch)
+        return await asyncio.gather(first, second, third)
+
+    assert asyncio.run(callers()) == ["headlines"] * 3
+    assert calls == 1
+    assert flights.stats["news"] == {"flights": 1, "coalesced": 2, "max_callers": 3}
+    assert not flights.in_flight("news", "climate")
+
+
+def test_concurrent_callers_share_one_exception():
+    flights = SingleFlight(bucket_seconds=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("BrightData returned 502")
+
+    async def callers():
+        return await asyncio.gather(
+            flights.do("news", "climate", fetch),
+            flights.do("news", "climate", fetch),
+            return_exceptions=True
+        )
+
+    first, second = asyncio.run(callers())
+    assert calls == 1
+    assert isinstance(first, RuntimeError) and first is second
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_task():
+    flights = SingleFlight(bucket_seconds=60)
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "headlines"
+
+    async def callers():
+        leaving = asyncio.ensure_future(flights.do("news", "climate", fetch))
+        staying = flights.do("news", "climate", fetch)
+        await asyncio.sleep(0)
+        leaving.cancel()
+        return await staying, leaving
+
+    result, leaving = asyncio.run(callers())
+    assert result == "headlines"
+    assert leaving.cancelled()
+
+
+def test_task_is_cancelled_once_every_caller_is():
+    flights = SingleFlight(bucket_seconds=60)
+    finished = False
+
+    async def fetch():
+        nonlocal finished
+        await asyncio.sleep(0.05)
+        finished = True
+
+    async def callers():
+        waiters = [asyncio.ensure_future(flights.do("news", "climate", fetch)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.sleep(0.01)
+        assert not flights.in_flight("news", "climate")
+        await asyncio.sleep(0.06)
+        for waiter in waiters:
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+
+    asyncio.run(callers())
+    assert not finished
@@ -0,0 +1,237 @@
+import asyncio
+import importlib.util
+import logging
+import os
+import re
+import uuid
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence, Set
+
+from prometheus_client import Counter
+from config import ARCHIVE_DIR
+from utils.cache import normalize_topic
+from utils.reddit_posts import RedditPost
+from utils.scraping import HeadlineRecord
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_ROWS = Counter(
+    "briefly_archive_rows_total",
+    "Records appended to the Parquet archive",
+    ["kind"]
+)
+
+
+@dataclass(slots=True)
+class ArticleRecord:
+    """A scraped headline as archived"""
+    scraped_at: datetime
+    topic: str
+    title: str
+    publisher: Optional[str]
+    published_at: Optional[str]
+    url: Optional[str]
+
+    @classmethod
+    def from_headline(cls, topic: str, record: HeadlineRecord, scraped_at: datetime) -> "ArticleRecord":
+        return cls(scraped_at, topic, record.title, record.publisher, record.published_at, record.url)
+
+
+@dataclass(slots=True)
+class PostRecord:
+    """A fetched Reddit post as archived, without its comments"""
+    scraped_at: datetime
+    topic: str
+    url: str
+    title: str
+    score: int
+    num_comments: int
+    posted_at: Optional[datetime]
+    community: Optional[str]
+
+    @classmethod
+    def from_post(cls, topic: str, post: RedditPost, scraped_at: datetime) -> "PostRecord":
+        return cls(scraped_at, topic, post.url, post.title, post.score, post.num_comments, post.posted_at, post.community)
+
+
+@dataclass(slots=True)
+class AnalysisRecord:
+    """One LLM analysis: a topic's news or Reddit section, or a whole report (source "report")"""
+    scraped_at: datetime
+    topic: str
+    source: str
+    content: str
+    status: str
+
+
+@lru_cache(maxsize=1)
+def _arrow() -> SimpleNamespace:
+    """pyarrow and the archive schemas, imported on the first read or write rather than at start-up"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    timestamp = pa.timestamp("us", tz="UTC")
+    schemas = {
+        "articles": (ArticleRecord, pa.schema([
+            ("scraped_at", timestamp),
+            ("topic", pa.string()),
+            ("title", pa.string()),
+            ("publisher", pa.string()),
+            ("published_at", pa.string()),
+            ("url", pa.string()),
+        ])),
+        "posts": (PostRecord, pa.schema([
+            ("scraped_at", timestamp),
+            ("topic", pa.string()),
+            ("url", pa.string()),
+            ("title", pa.string()),
+            ("score", pa.int64()),
+            ("num_comments", pa.int64()),
+            ("posted_at", timestamp),
+            ("community", pa.string()),
+        ])),
+        "analyses": (AnalysisRecord, pa.schema([
+            ("scraped_at", timestamp),
+            ("topic", pa.string()),
+            ("source", pa.string()),
+            ("content", pa.string()),
+            ("status", pa.string()),
+        ])),
+    }
+    partitions = [pa.field("date", pa.string()), pa.field("topic_key", pa.string())]
+    return SimpleNamespace(
+        pa=pa, pc=pc, ds=ds, pq=pq,
+        schemas=schemas,
+        partition_fields=partitions,
+        partitioning=ds.partitioning(pa.schema(partitions), flavor="hive")
+    )
+
+
+_UNSAFE_PATH_RE = re.compile(r"[^a-z0-9]+")
+
+
+def topic_key(topic: str) -> str:
+    """Partition directory name for a topic; spellings that share a cache entry share it too"""
+    return _UNSAFE_PATH_RE.sub("-", normalize_topic(topic)).strip("-") or "_"
+
+
+class Archive:
+    """
+    Append-only Parquet archive of scraped articles, Reddit posts and analyses.
+
+    Files are partitioned as <kind>/date=YYYY-MM-DD/topic_key=<topic>/, one
+    file per append, so queries for a topic or a date range only open the
+    matching directories and only decode the columns they ask for. Results
+    stay Arrow tables until the caller converts them.
+    """
+
+    def __init__(self, path: str = ARCHIVE_DIR):
+        self.path = path
+        self.enabled = bool(path) and importlib.util.find_spec("pyarrow") is not None
+        if path and not self.enabled:
+            logger.warning("pyarrow is not installed, the article archive is disabled")
+        self._pending: Set[asyncio.Task] = set()
+
+    def append(self, kind: str, records: Sequence):
+        """Write records of one kind, one Parquet file per (date, topic) among them"""
+        if not self.enabled or not records:
+            return
+        arrow = _arrow()
+        cls, schema = arrow.schemas[kind]
+        partitions: Dict[tuple, list] = {}
+        for record in records:
+            partitions.setdefault((f"{record.scraped_at:%Y-%m-%d}", topic_key(record.topic)), []).append(record)
+
+        for (date, key), rows in partitions.items():
+            columns = {field.name: [getattr(row, field.name) for row in rows] for field in fields(cls)}
+            directory = os.path.join(self.path, kind, f"date={date}", f"topic_key={key}")
+            os.makedirs(directory, exist_ok=True)
+            arrow.pq.write_table(arrow.pa.table(columns, schema=schema), os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet"))
+        ARCHIVED_ROWS.labels(kind).inc(len(records))
+
+    async def append_async(self, kind: str, records: Sequence):
+        """append() off the event loop; archive failures are logged, never raised"""
+        if not self.enabled or not records:
+            return
+        try:
+            await asyncio.to_thread(self.append, kind, records)
+        except Exception as e:
+            logger.warning("Archive write failed", extra={"kind": kind, "records": len(records), "error": str(e)})
+
+    def submit(self, kind: str, records: Sequence):
+        """Write records in the background so scraping and analysis never wait on the archive"""
+        if not self.enabled or not records:
+            return
+        task = asyncio.create_task(self.append_async(kind, records))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def drain(self):
+        """Wait for background writes, e.g. before the process exits"""
+        while self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def read(
+        self,
+        kind: str,
+        topic: Optional[str] = None,
+        days: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        filter=None
+    ):
+        """Rows of kind for topic over the last days, restricted to columns, as a pyarrow Table"""
+        arrow = _arrow()
+        _, schema = arrow.schemas[kind]
+        full_schema = arrow.pa.schema(list(schema) + arrow.partition_fields)
+        directory = os.path.join(self.path, kind)
+        if not self.enabled or not os.path.isdir(directory):
+            return full_schema.empty_table().select(columns or schema.names)
+
+        dataset = arrow.ds.dataset(directory, format="parquet", partitioning=arrow.partitioning, schema=full_schema)
+        conditions = [] if filter is None else [filter]
+        if topic is not None:
+            conditions.append(arrow.ds.field("topic_key") == topic_key(topic))
+        if days is not None:
+            since = datetime.now(timezone.utc) - timedelta(days=days)
+            conditions.append(arrow.ds.field("date") >= f"{since:%Y-%m-%d}")
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return dataset.to_table(columns=columns or schema.names, filter=expression)
+
+    def headline_trend(self, topic: str, days: int = 30) -> List[dict]:
+        """Headlines, distinct stories and publishers scraped per day for topic"""
+        table = self.read("articles", topic, days, columns=["title", "publisher", "date"])
+        counts = table.group_by("date").aggregate([
+            ("title", "count"),
+            ("title", "count_distinct"),
+            ("publisher", "count_distinct"),
+        ]).sort_by("date")
+        return [
+            {"date": row["date"], "headlines": row["title_count"], "stories": row["title_count_distinct"], "publishers": row["publisher_count_distinct"]}
+            for row in counts.to_pylist()
+        ]
+
+    def top_publishers(self, topic: str, days: int = 30, limit: int = 10) -> List[dict]:
+        """Publishers that carried the most headlines about topic"""
+        table = self.read("articles", topic, days, columns=["publisher"], filter=_arrow().ds.field("publisher").is_valid())
+        counts = table.group_by("publisher").aggregate([("publisher", "count")])
+        counts = counts.sort_by([("publisher_count", "descending")]).slice(0, limit)
+        return [{"publisher": row["publisher"], "headlines": row["publisher_count"]} for row in counts.to_pylist()]
+
+    def history(self, topic: str, source: Optional[str] = None, days: Optional[int] = None, limit: int = 20) -> List[dict]:
+        """Past analyses of topic, newest first"""
+        condition = None if source is None else _arrow().ds.field("source") == source
+        table = self.read("analyses", topic, days, columns=["scraped_at", "source", "status", "content"], filter=condition)
+        if table.num_rows == 0:
+            return []
+        newest = _arrow().pc.sort_indices(table, sort_keys=[("scraped_at", "descending")])[:limit]
+        return table.take(newest).to_pylist()
+
+
+archive = Archive()
@@ -0,0 +1,328 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from config import (
+    SCRAPE_CACHE_TTL,
+    SCRAPE_CACHE_STALE_SECONDS,
+    SCRAPE_CACHE_MAX_ENTRIES,
+    SCRAPE_CACHE_DB,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_DB,
+    SHARED_STORE,
+    SHARED_STORE_DB,
+    REDIS_URL
+)
+from utils.shared_store import connect_sqlite, redis
+from utils.singleflight import singleflight
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_topic(topic: str) -> str:
+    """Normalize a topic so trivially different spellings share a cache entry"""
+    return " ".join(topic.lower().split())
+
+
+class LRUCache:
+    """In-memory LRU of (stored_at, value) pairs"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, stored_at: float, value: Any):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class SQLiteCacheTier:
+    """Persistent cache tier so entries survive restarts"""
+
+    def __init__(self, path: str, table: str = "scrape_cache", max_entries: Optional[int] = None):
+        self.table = table
+        self.max_entries = max_entries
+        self._conn = connect_sqlite(path)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        row = self._conn.execute(
+            f"SELECT stored_at, value FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def set(self, key: str, stored_at: float, value: Any):
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, stored_at, value) VALUES (?, ?, ?)",
+            (key, stored_at, json.dumps(value))
+        )
+        if self.max_entries:
+            # Drop the oldest rows beyond the size limit
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        self._conn.commit()
+
+    def clear(self):
+        self._conn.execute(f"DELETE FROM {self.table}")
+        self._conn.commit()
+
+
+class RedisCacheTier:
+    """
+    Cache tier in Redis, shared by every worker process.
+    Size is bounded by the server's maxmemory eviction policy rather than max_entries.
+    """
+
+    def __init__(self, url: str, table: str = "scrape_cache"):
+        if redis is None:
+            raise RuntimeError("SHARED_STORE=redis needs the redis package: pip install redis")
+        self.table = table
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        raw = self._client.get(f"{self.table}:{key}")
+        if raw is None:
+            return None
+        stored_at, value = json.loads(raw)
+        return stored_at, value
+
+    def set(self, key: str, stored_at: float, value: Any):
+        self._client.set(f"{self.table}:{key}", json.dumps([stored_at, value]))
+
+    def clear(self):
+        keys = list(self._client.scan_iter(f"{self.table}:*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+def make_cache_tier(path: Optional[str], table: str, max_entries: Optional[int] = None):
+    """
+    Persistent tier behind an in-memory cache: Redis when SHARED_STORE is redis,
+    otherwise SQLite at path, falling back to the shared database when workers share state.
+    """
+    if SHARED_STORE == "redis":
+        return RedisCacheTier(REDIS_URL, table)
+    if path:
+        return SQLiteCacheTier(path, table, max_entries)
+    if SHARED_STORE == "sqlite":
+        return SQLiteCacheTier(SHARED_STORE_DB, table, max_entries)
+    return None
+
+
+class ScrapeCache:
+    """
+    TTL cache for scraped topic data keyed by (source, normalized topic).
+
+    Entries younger than the source TTL are served as hits. Entries past the
+    TTL but within the stale window are served immediately while a single
+    background refresh revalidates them (stale-while-revalidate).
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Dict[str, int] = SCRAPE_CACHE_TTL,
+        stale_seconds: int = SCRAPE_CACHE_STALE_SECONDS,
+        max_entries: int = SCRAPE_CACHE_MAX_ENTRIES,
+        db_path: Optional[str] = SCRAPE_CACHE_DB
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._memory = LRUCache(max_entries)
+        self._disk = make_cache_tier(db_path, "scrape_cache")
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def _key(source: str, topic: str) -> str:
+        return f"{source}:{normalize_topic(topic)}"
+
+    def _read(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._memory.get(key)
+        if entry is None and self._disk is not None:
+            entry = self._disk.get(key)
+            if entry is not None:
+                self._memory.set(key, *entry)
+        return entry
+
+    def lookup(self, source: str, topic: str) -> Tuple[Optional[Any], Dict[str, Any]]:
+        """Return (value, cache_info); value is None on a miss"""
+        entry = self._read(self._key(source, topic))
+        if entry is None:
+            return None, {"status": "miss", "age_seconds": None}
+
+        stored_at, value = entry
+        age = time.time() - stored_at
+        ttl = self.ttl_seconds.get(source, 0)
+        if age <= ttl:
+            return value, {"status": "hit", "age_seconds": round(age, 1)}
+        if age <= ttl + self.stale_seconds:
+            return value, {"status": "stale", "age_seconds": round(age, 1)}
+        return None, {"status": "miss", "age_seconds": None}
+
+    def store(self, source: str, topic: str, value: Any):
+        key = self._key(source, topic)
+        stored_at = time.time()
+        self._memory.set(key, stored_at, value)
+        if self._disk is not None:
+            self._disk.set(key, stored_at, value)
+
+    def revalidate(self, source: str, topic: str, fetch: Callable[[], Awaitable[Any]]):
+        """
+        Start a background refresh unless one is already running for this key.
+        It goes through refresh(), so it joins a miss or pre-warm fetch in flight.
+        """
+        key = self._key(source, topic)
+        if key in self._refreshing:
+            return
+
+        async def _refresh():
+            try:
+                await self.refresh(source, topic, fetch)
+            except Exception as e:
+                logger.warning("Background refresh failed for %s: %s", key, e)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(_refresh())
+
+    def clear(self):
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    async def get_or_fetch(
+        self,
+        source: str,
+        topic: str,
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Serve from cache when possible, otherwise fetch and store.
+
+        Concurrent misses for the same key share one fetch.
+        """
+        value, info = self.lookup(source, topic)
+        if info["status"] == "stale":
+            self.revalidate(source, topic, fetch)
+        if value is not None:
+            return value, info
+
+        coalesced = singleflight.in_flight(source, normalize_topic(topic))
+        value = await self.refresh(source, topic, fetch)
+        return value, {"status": "miss", "age_seconds": 0.0, "coalesced": coalesced}
+
+    async def refresh(self, source: str, topic: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Fetch and store regardless of what is cached; concurrent refreshes share one fetch"""
+        async def fetch_and_store():
+            fetched = await fetch()
+            self.store(source, topic, fetched)
+            return fetched
+
+        # Keyed like the Reddit batch flights in scrape_reddit_topics, so those are joined too
+        return await singleflight.do(source, normalize_topic(topic), fetch_and_store)
+
+
+_request_llm_stats: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_llm_stats", default=None)
+
+
+def _empty_llm_stats() -> Dict[str, float]:
+    return {"hits": 0, "misses": 0, "coalesced": 0, "tokens_saved": 0, "ms_saved": 0.0}
+
+
+def track_llm_cache_usage() -> Dict[str, float]:
+    """Start collecting LLM cache savings for the current request and return the live dict"""
+    stats = _empty_llm_stats()
+    _request_llm_stats.set(stats)
+    return stats
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of LLM completions.
+
+    Keys hash the model, sampling parameters, prompt version, system prompt and
+    user content, so any change to the prompt produces a different entry.
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, db_path: Optional[str] = LLM_CACHE_DB):
+        self._memory = LRUCache(max_entries)
+        self._disk = make_cache_tier(db_path, "llm_cache", max_entries * 4)
+        self.stats = _empty_llm_stats()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: str,
+        user_content: str,
+        prompt_version: str
+    ) -> str:
+        payload = json.dumps([prompt_version, model, temperature, max_tokens, system_prompt, user_content])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _record(self, **deltas):
+        for stats in (self.stats, _request_llm_stats.get()):
+            if stats is None:
+                continue
+            for name, delta in deltas.items():
+                stats[name] += delta
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is None and self._disk is not None:
+            entry = self._disk.get(key)
+            if entry is not None:
+                self._memory.set(key, *entry)
+
+        if entry is None:
+            self._record(misses=1)
+            return None
+
+        value = entry[1]
+        self._record(hits=1, tokens_saved=value["tokens"], ms_saved=value["latency_ms"])
+        return value
+
+    def record_coalesced(self):
+        """A miss that joined an identical in-flight completion instead of calling the LLM"""
+        self._record(coalesced=1)
+
+    def put(self, key: str, content: str, tokens: int, latency_ms: float):
+        value = {"content": content, "tokens": tokens, "latency_ms": round(latency_ms, 1)}
+        stored_at = time.time()
+        self._memory.set(key, stored_at, value)
+        if self._disk is not None:
+            self._disk.set(key, stored_at, value)
+
+    def clear(self):
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+
+scrape_cache = ScrapeCache()
+llm_cache = LLMResponseCache()
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Optional, Tuple, TypeVar
+
+from prometheus_client import Counter
+
+T = TypeVar("T")
+
+DEADLINE_EXPIRED = Counter(
+    "briefly_deadline_expired_total",
+    "Work cancelled because the request deadline passed",
+    ["stage"]
+)
+
+# (expires at on the monotonic clock, total budget in seconds)
+_deadline: ContextVar[Optional[Tuple[float, float]]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The request deadline passed before the work finished"""
+    pass
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    Give the enclosed work at most seconds; None keeps the current deadline.
+
+    Tasks started inside inherit the deadline. A nested scope can only
+    shorten it.
+    """
+    current = _deadline.get()
+    if seconds is None:
+        yield
+        return
+
+    expires_at = time.monotonic() + max(seconds, 0.0)
+    if current is not None and current[0] <= expires_at:
+        yield
+        return
+
+    token = _deadline.set((expires_at, seconds))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline, or None without one"""
+    current = _deadline.get()
+    return None if current is None else max(current[0] - time.monotonic(), 0.0)
+
+
+def budget() -> Optional[float]:
+    """The deadline's total budget in seconds, or None without one"""
+    current = _deadline.get()
+    return None if current is None else current[1]
+
+
+async def with_deadline(aw: Awaitable[T], stage: str) -> T:
+    """Await aw, cancelling it and raising DeadlineExceeded when the deadline passes"""
+    timeout = remaining()
+    if timeout is None:
+        return await aw
+    try:
+        return await asyncio.wait_for(aw, timeout)
+    except asyncio.TimeoutError as e:
+        if isinstance(e, DeadlineExceeded) or remaining() > 0:
+            # Raised by the work itself, not by this deadline
+            raise
+        DEADLINE_EXPIRED.labels(stage).inc()
+        raise DeadlineExceeded(f"{stage} did not finish within the deadline") from None
@@ -0,0 +1,141 @@
+import hashlib
+import random
+import re
+from dataclasses import replace
+from typing import Dict, FrozenSet, List, Tuple
+
+from config import NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_MIN_SHARED_WORDS, CROSS_TOPIC_THRESHOLD, DEDUP_ACROSS_TOPICS
+from utils.scraping import HeadlineRecord, format_headlines
+from utils.tokens import count_tokens
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("a an and are as at by for from in is it its of on or that the this to was with".split())
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_NUM_PERMUTATIONS = 64
+_random = random.Random(1337)
+_PERMUTATIONS = [
+    (_random.randrange(1, _MERSENNE_PRIME), _random.randrange(0, _MERSENNE_PRIME))
+    for _ in range(_NUM_PERMUTATIONS)
+]
+
+
+def normalize_headline(title: str) -> str:
+    """Lowercase, drop punctuation and a trailing " - Publisher" suffix"""
+    title = re.sub(r"\s+[-|–]\s+[^-|–]+$", "", title)
+    return " ".join(_WORD_RE.findall(title.lower()))
+
+
+def _content_words(text: str) -> FrozenSet[str]:
+    return frozenset(word for word in text.split() if word not in _STOPWORDS) or frozenset(text.split())
+
+
+def minhash(text: str) -> Tuple[int, ...]:
+    """MinHash signature over the headline's content words"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big")
+        for word in _content_words(text)
+    ]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME for h in hashes), default=0)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def _similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(x == y for x, y in zip(a, b)) / _NUM_PERMUTATIONS
+
+
+def _near_duplicate(a: FrozenSet[str], b: FrozenSet[str], threshold: float, min_shared: int) -> bool:
+    """
+    Exact Jaccard check for a MinHash candidate. Headlines are only a few
+    words long, so one differing word ("... order on AI" / "... order on
+    tariffs") is a different story; short headlines must also share
+    min_shared content words, or all of them when they have fewer.
+    """
+    shared = len(a & b)
+    return shared / len(a | b) >= threshold and shared >= min(min_shared, len(a), len(b))
+
+
+def dedupe_topic_headlines(
+    headlines: Dict[str, List[HeadlineRecord]],
+    threshold: float = NEAR_DUPLICATE_THRESHOLD,
+    across_topics: bool = DEDUP_ACROSS_TOPICS,
+    cross_topic_threshold: float = CROSS_TOPIC_THRESHOLD,
+    min_shared_words: int = NEAR_DUPLICATE_MIN_SHARED_WORDS
+) -> Tuple[Dict[str, List[HeadlineRecord]], Dict[str, int]]:
+    """
+    Collapse exact and near-duplicate headlines into one representative each.
+
+    Topics are processed in order, so with across_topics a story shared by two
+    topics is kept under the first one; that takes an exact match or a
+    similarity of at least cross_topic_threshold. A topic never loses all of
+    its headlines to other topics: if it would, its first one is kept. Each
+    representative carries the size of its cluster in ``count``.
+    """
+    deduped = {topic: [] for topic in headlines}
+    exact_duplicates = 0
+    near_duplicates = 0
+
+    # Each cluster is [topic, index in deduped[topic], minhash signature, content words]
+    clusters_by_hash = {}
+    clusters = []
+
+    for topic, records in headlines.items():
+        if not across_topics:
+            clusters_by_hash = {}
+            clusters = []
+        given_away = []  # (record, cluster, exact) merged into another topic's clusters
+
+        for record in records:
+            normalized = normalize_headline(record.title)
+            digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+            signature = words = None
+
+            cluster = clusters_by_hash.get(digest)
+            exact = cluster is not None
+            if cluster is None:
+                signature = minhash(normalized)
+                words = _content_words(normalized)
+                for candidate in clusters:
+                    required = threshold if candidate[0] == topic else max(threshold, cross_topic_threshold)
+                    if _similarity(candidate[2], signature) >= required and _near_duplicate(
+                        candidate[3], words, required, min_shared_words
+                    ):
+                        cluster = candidate
+                        break
+
+            if cluster is not None:
+                owner, index, _, _ = cluster
+                deduped[owner][index].count += 1
+                if owner != topic:
+                    given_away.append((record, cluster, exact))
+                else:
+                    exact_duplicates += exact
+                    near_duplicates += not exact
+                continue
+
+            deduped[topic].append(replace(record, count=1))
+            cluster = [topic, len(deduped[topic]) - 1, signature, words]
+            clusters_by_hash[digest] = cluster
+            clusters.append(cluster)
+
+        if records and not deduped[topic]:
+            # Every headline was already kept under another topic; keep this topic's first one too
+            record, (owner, index, _, _), _ = given_away.pop(0)
+            deduped[owner][index].count -= 1
+            deduped[topic].append(replace(record, count=1))
+        for _, _, exact in given_away:
+            exact_duplicates += exact
+            near_duplicates += not exact
+
+    stats = {
+        "headlines_in": sum(len(records) for records in headlines.values()),
+        "headlines_out": sum(len(records) for records in deduped.values()),
+        "exact_duplicates": exact_duplicates,
+        "near_duplicates": near_duplicates,
+        "prompt_tokens_before": sum(count_tokens(format_headlines(records)) for records in headlines.values()),
+        "prompt_tokens_after": sum(count_tokens(format_headlines(records)) for records in deduped.values())
+    }
+    return deduped, stats
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import DIGEST_DB, DIGEST_MAX_FINGERPRINTS
+from utils.cache import normalize_topic
+from utils.shared_store import connect_sqlite
+from utils.dedup import normalize_headline
+from utils.scraping import HeadlineRecord
+
+
+def headline_fingerprint(record: HeadlineRecord) -> str:
+    """Stable identity of a headline across runs, ignoring case, punctuation and publisher suffix"""
+    return hashlib.sha1(normalize_headline(record.title).encode("utf-8")).hexdigest()[:16]
+
+
+def merge_digest(previous: str, delta: str) -> str:
+    """Put the newest update section above the previous digest"""
+    when = datetime.now().strftime("%Y-%m-%d %H:%M")
+    return f"## Latest Updates ({when})\n\n{delta.strip()}\n\n{previous}"
+
+
+class DigestStore:
+    """Per-topic headline fingerprints and the digest they produced"""
+
+    def __init__(self, path: str = DIGEST_DB):
+        self._conn = connect_sqlite(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS digests ("
+            "topic TEXT PRIMARY KEY, fingerprints TEXT NOT NULL, summary TEXT NOT NULL, "
+            "updates INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, topic: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT * FROM digests WHERE topic = ?", (normalize_topic(topic),)
+        ).fetchone()
+        if row is None:
+            return None
+        digest = dict(row)
+        digest["fingerprints"] = json.loads(digest["fingerprints"])
+        return digest
+
+    def save(self, topic: str, fingerprints: List[str], summary: str, updates: int):
+        """Store a digest; updates counts delta sections merged since the last full summary"""
+        # Keep the most recent fingerprints, preserving order
+        fingerprints = list(dict.fromkeys(fingerprints))[-DIGEST_MAX_FINGERPRINTS:]
+        self._conn.execute(
+            "INSERT OR REPLACE INTO digests (topic, fingerprints, summary, updates, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (normalize_topic(topic), json.dumps(fingerprints), summary, updates, time.time())
+        )
+        self._conn.commit()
+
+
+digest_store = DigestStore()
@@ -0,0 +1,22 @@
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Awaitable, Optional
+
+_event_queue: ContextVar[Optional[asyncio.Queue]] = ContextVar("event_queue", default=None)
+
+
+def events_enabled() -> bool:
+    return _event_queue.get() is not None
+
+
+def emit_event(event: str, **data: Any):
+    """Publish a pipeline progress event to the current subscriber, if any"""
+    queue = _event_queue.get()
+    if queue is not None:
+        queue.put_nowait({"event": event, **data})
+
+
+async def run_with_events(queue: asyncio.Queue, coro: Awaitable[Any]) -> Any:
+    """Await coro with every emit_event() inside it delivered to queue"""
+    _event_queue.set(queue)
+    return await coro
@@ -0,0 +1,71 @@
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from prometheus_client import Counter, Histogram
+
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    "briefly_request_seconds",
+    "HTTP request latency by endpoint",
+    ["method", "endpoint", "status"],
+    buckets=STAGE_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    "briefly_stage_seconds",
+    "Pipeline stage latency (scrape, parse, map_llm, reduce_llm, mcp_agent, reddit_pipeline, mcp_search, mcp_scrape)",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+GROQ_TOKENS = Counter(
+    "briefly_groq_tokens_total",
+    "Tokens consumed by Groq completions",
+    ["model", "kind"]
+)
+RETRIES = Counter(
+    "briefly_retries_total",
+    "Retry attempts by operation",
+    ["operation"]
+)
+RATE_LIMIT_WAIT = Histogram(
+    "briefly_rate_limit_wait_seconds",
+    "Time spent waiting on a rate limiter",
+    ["limiter"],
+    buckets=(0.001, 0.01, 0.1, 0.5, 1, 2.5, 5, 15, 30, 60)
+)
+
+
+@contextmanager
+def observe_stage(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+
+
+async def acquire(limiter, name: str):
+    """Acquire an AsyncLimiter, recording how long the caller waited"""
+    start = time.perf_counter()
+    await limiter.acquire()
+    RATE_LIMIT_WAIT.labels(name).observe(time.perf_counter() - start)
+
+
+@asynccontextmanager
+async def rate_limited(limiter, name: str):
+    await acquire(limiter, name)
+    yield
+
+
+def record_token_usage(model: str, message):
+    usage = getattr(message, "usage_metadata", None) or {}
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            GROQ_TOKENS.labels(model, kind.split("_")[0]).inc(usage[kind])
+
+
+def count_retry(operation: str):
+    """tenacity before_sleep hook counting retries of operation"""
+    def before_sleep(retry_state):
+        RETRIES.labels(operation).inc()
+    return before_sleep
@@ -0,0 +1,48 @@
+from typing import List
+
+from prometheus_client import Counter
+from config import MODEL_TIERS, MODEL_POLICIES, MODEL_POLICY, MODEL_FALLBACKS, MODEL_PRICES
+
+MODEL_FALLBACK_CALLS = Counter(
+    "briefly_model_fallbacks_total",
+    "Completions moved to a fallback model after a 429",
+    ["stage", "model"]
+)
+
+_policy = MODEL_POLICY
+
+
+def use_policy(name: str):
+    """Route later completions with the named policy from MODEL_POLICIES"""
+    global _policy
+    if name not in MODEL_POLICIES:
+        raise ValueError(f"Unknown MODEL_POLICY: {name}")
+    _policy = name
+
+
+def active_policy() -> str:
+    return _policy
+
+
+def model_for(stage: str) -> str:
+    """Model the active policy assigns to a pipeline stage"""
+    return MODEL_TIERS[MODEL_POLICIES[_policy][stage]]
+
+
+def fallback_chain(stage: str) -> List[str]:
+    """The stage's model followed by the models to try, in order, when it is rate limited"""
+    tier = MODEL_POLICIES[_policy][stage]
+    chain = []
+    for name in [tier] + MODEL_FALLBACKS.get(tier, []):
+        if MODEL_TIERS[name] not in chain:
+            chain.append(MODEL_TIERS[name])
+    return chain
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """USD for a completion at MODEL_PRICES; 0 for models without a price"""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+use_policy(MODEL_POLICY)
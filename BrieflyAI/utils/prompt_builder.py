@@ -0,0 +1,119 @@
+import re
+from functools import lru_cache
+from typing import Dict, Hashable, List, Tuple
+
+from utils.tokens import count_tokens, truncate_to_tokens
+
+SOURCE_LABELS = {
+    "news": "NEWS SOURCES",
+    "reddit": "REDDIT DISCUSSIONS",
+}
+
+# Lower numbers are kept longest when a block has to shrink
+_SECTION_PRIORITIES = [
+    ("executive summary", 0),
+    ("overview", 0),
+    ("key", 0),
+    ("sentiment", 1),
+    ("analysis", 1),
+    ("discussion", 1),
+    ("trend", 2),
+    ("quote", 2),
+]
+_HEADING_RE = re.compile(r"^(#{1,6}\s|\*\*[^*]+\*\*:?\s*$|\d+\.\s+\*\*)", re.MULTILINE)
+
+
+def allocate_budget(demands: Dict[Hashable, int], budget: int) -> Dict[Hashable, int]:
+    """
+    Max-min fair split of budget: small demands are met in full and the
+    leftover is shared equally among the larger ones.
+    """
+    allocation = {}
+    remaining = dict(demands)
+    left = budget
+    while remaining:
+        share = left // len(remaining)
+        satisfied = {key: demand for key, demand in remaining.items() if demand <= share}
+        if not satisfied:
+            allocation.update({key: share for key in remaining})
+            break
+        for key, demand in satisfied.items():
+            allocation[key] = demand
+            left -= demand
+            del remaining[key]
+    return allocation
+
+
+def _split_sections(text: str) -> List[str]:
+    starts = [match.start() for match in _HEADING_RE.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return [text[start:end].strip() for start, end in zip(starts, starts[1:] + [len(text)]) if text[start:end].strip()]
+
+
+def _section_priority(index: int, section: str) -> int:
+    if index == 0:
+        return 0
+    heading = section.splitlines()[0].lower()
+    return next((priority for keyword, priority in _SECTION_PRIORITIES if keyword in heading), 1)
+
+
+@lru_cache(maxsize=1024)
+def fit_to_budget(text: str, budget: int) -> str:
+    """Shrink text to budget tokens, dropping its lowest-value sections first"""
+    if count_tokens(text) <= budget:
+        return text
+
+    sections = _split_sections(text)
+    kept = list(range(len(sections)))
+    drop_order = sorted(kept, key=lambda i: (_section_priority(i, sections[i]), i), reverse=True)
+    for index in drop_order:
+        if len(kept) == 1 or count_tokens("\n\n".join(sections[i] for i in kept)) <= budget:
+            break
+        kept.remove(index)
+
+    fitted = "\n\n".join(sections[i] for i in kept)
+    if count_tokens(fitted) > budget:
+        fitted = truncate_to_tokens(fitted, max(budget - 1, 0)).rstrip() + "…"
+    return fitted
+
+
+@lru_cache(maxsize=256)
+def _topic_block(topic: str, sources: Tuple[Tuple[str, str, int], ...]) -> str:
+    context = [f"{SOURCE_LABELS[source]}:\n{fit_to_budget(content, budget)}" for source, content, budget in sources]
+    return f"TOPIC: {topic}\n\n" + "\n\n".join(context)
+
+
+def build_topic_blocks(
+    topic_sources: Dict[str, Dict[str, str]],
+    budget: int
+) -> Tuple[List[str], Dict[str, Dict[str, Dict[str, int]]]]:
+    """
+    Render one block per topic within a shared token budget.
+
+    The budget is split fairly across topics, then across each topic's
+    sources. Blocks are cached on their inputs, so a change to one topic
+    leaves the others' cached blocks in place unless their share moves.
+    """
+    demands = {
+        topic: {source: count_tokens(content) for source, content in sources.items()}
+        for topic, sources in topic_sources.items()
+    }
+    topic_budgets = allocate_budget({topic: sum(d.values()) for topic, d in demands.items()}, budget)
+
+    blocks = []
+    stats = {}
+    for topic, sources in topic_sources.items():
+        source_budgets = allocate_budget(demands[topic], topic_budgets[topic])
+        blocks.append(_topic_block(
+            topic,
+            tuple((source, content, source_budgets[source]) for source, content in sources.items())
+        ))
+        stats[topic] = {
+            source: {
+                "tokens_in": demands[topic][source],
+                "tokens_out": count_tokens(fit_to_budget(content, source_budgets[source]))
+            }
+            for source, content in sources.items()
+        }
+    return blocks, stats
@@ -0,0 +1,133 @@
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
+
+from utils.prompt_builder import allocate_budget
+from utils.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+_POST_URL_RE = re.compile(
+    r"https?://(?:www\.|old\.)?reddit\.com/r/[\w-]+/comments/(?P<post_id>\w+)(?:/[^\s)\]\"'<>?#]*)?"
+)
+
+
+@dataclass
+class RedditPost:
+    """A Reddit post returned by the BrightData posts tool"""
+    url: str
+    title: str
+    body: str = ""
+    score: int = 0
+    num_comments: int = 0
+    posted_at: Optional[datetime] = None
+    community: Optional[str] = None
+    comments: List[Tuple[int, str]] = field(default_factory=list)  # (score, text), highest scored first
+
+
+def extract_post_urls(search_results: str, limit: int) -> List[str]:
+    """Reddit post URLs in search result text, in ranking order and one per post"""
+    urls = []
+    seen = set()
+    for match in _POST_URL_RE.finditer(search_results):
+        post_id = match.group("post_id")
+        if post_id not in seen:
+            seen.add(post_id)
+            urls.append(match.group(0).replace("old.reddit.com", "www.reddit.com"))
+        if len(urls) == limit:
+            break
+    return urls
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _first(record: dict, *names: str, default: Any = None) -> Any:
+    return next((record[name] for name in names if record.get(name) is not None), default)
+
+
+def _parse_comments(comments: Any) -> List[Tuple[int, str]]:
+    parsed = []
+    for comment in comments if isinstance(comments, list) else []:
+        if not isinstance(comment, dict):
+            continue
+        text = _first(comment, "comment", "body", default="").strip()
+        if text:
+            parsed.append((int(_first(comment, "num_upvotes", "score", default=0) or 0), text))
+    return sorted(parsed, key=lambda item: item[0], reverse=True)
+
+
+def parse_post_records(payload: str) -> List[RedditPost]:
+    """Posts from the tool's JSON output; anything that is not a post record is skipped"""
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        logger.warning("Reddit post payload is not JSON", extra={"payload": payload[:200]})
+        return []
+
+    posts = []
+    for record in data if isinstance(data, list) else [data]:
+        if not isinstance(record, dict) or not record.get("title"):
+            continue
+        posts.append(RedditPost(
+            url=_first(record, "url", default=""),
+            title=record["title"].strip(),
+            body=(_first(record, "description", "selftext", "body", default="") or "").strip(),
+            score=int(_first(record, "num_upvotes", "score", "upvotes", default=0) or 0),
+            num_comments=int(_first(record, "num_comments", default=0) or 0),
+            posted_at=_parse_date(_first(record, "date_posted", "created_utc")),
+            community=_first(record, "community_name", "subreddit"),
+            comments=_parse_comments(record.get("comments"))
+        ))
+    return posts
+
+
+def filter_posts(posts: List[RedditPost], since: datetime, min_score: int, limit: int) -> List[RedditPost]:
+    """
+    The highest scored posts published since the cutoff.
+
+    Posts without a publication date are dropped, since the cutoff can't be
+    checked for them.
+    """
+    unique = {post.url or post.title: post for post in posts}.values()
+    recent = [
+        post for post in unique
+        if post.posted_at is not None and post.posted_at >= since and post.score >= min_score
+    ]
+    return sorted(recent, key=lambda post: post.score, reverse=True)[:limit]
+
+
+def _render_post(post: RedditPost, max_comments: int) -> str:
+    header = f"POST: {post.title}"
+    details = ", ".join(part for part in (
+        f"r/{post.community}" if post.community else None,
+        post.posted_at.strftime("%Y-%m-%d") if post.posted_at else None,
+        f"{post.score} upvotes",
+        f"{post.num_comments} comments"
+    ) if part)
+    lines = [f"{header} ({details})"]
+    if post.body:
+        lines.append(post.body)
+    if post.comments:
+        lines.append("TOP COMMENTS:")
+        lines.extend(f"- ({score} upvotes) {text}" for score, text in post.comments[:max_comments])
+    return "\n".join(lines)
+
+
+def format_posts(posts: List[RedditPost], budget: int, max_comments: int) -> str:
+    """Render posts with their top comments, sharing budget tokens fairly between posts"""
+    rendered = [_render_post(post, max_comments) for post in posts]
+    budgets = allocate_budget({index: count_tokens(text) for index, text in enumerate(rendered)}, budget)
+    return "\n\n".join(truncate_to_tokens(text, budgets[index]) for index, text in enumerate(rendered))
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import re
+
+import orjson
+
+_BOLD_RE = re.compile(r'\*\*(.*?)\*\*')
+_ITALIC_RE = re.compile(r'(?<!\*)\*(?!\*)([^*]+)\*(?!\*)')
+_BULLET_RE = re.compile(r'^\* ', re.MULTILINE)
+
+_HEADINGS = (
+    ('### ', "<h4 style='color: #5a6c7d; margin-top: 1rem; margin-bottom: 0.5rem; font-weight: 500;'>{}</h4>"),
+    ('## ', "<h3 style='color: #34495e; margin-top: 1.5rem; margin-bottom: 0.8rem; font-weight: 600;'>{}</h3>"),
+    ('# ', "<h2 style='color: #2c3e50; margin-top: 2rem; margin-bottom: 1rem; font-weight: 700;'>{}</h2>"),
+)
+_BULLET_HTML = "<div style='margin-left: 1rem; margin-bottom: 0.5rem; line-height: 1.6;'><span style='color: #667eea; font-weight: bold;'>•</span> {}</div>"
+_PARAGRAPH_HTML = "<p style='margin-bottom: 1rem; line-height: 1.8; text-align: justify;'>{}</p>"
+
+
+def content_hash(summary_data: dict) -> str:
+    """Stable hash of an analysis payload, used to key its rendered artifacts"""
+    return hashlib.sha256(orjson.dumps(summary_data, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def summary_to_html(summary: str) -> str:
+    """Render the report's markdown subset (headings, bullets, bold, italic) as styled HTML"""
+    content = _BOLD_RE.sub(r'<strong>\1</strong>', summary)
+    content = _ITALIC_RE.sub(r'<em>\1</em>', content)
+    content = _BULLET_RE.sub('• ', content)
+
+    parts = []
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        for prefix, template in _HEADINGS:
+            if line.startswith(prefix):
+                parts.append(template.format(line[len(prefix):]))
+                break
+        else:
+            if line.startswith('• '):
+                parts.append(_BULLET_HTML.format(line[2:]))
+            elif not line.startswith('#'):
+                parts.append(_PARAGRAPH_HTML.format(line))
+
+    html = ''.join(parts)
+    if not html.strip():
+        # Nothing matched line by line; fall back to plain paragraphs
+        html = ''.join(_PARAGRAPH_HTML.format(p.strip()) for p in content.split('\n\n') if p.strip())
+    return html
+
+
+def export_json(summary_data: dict) -> str:
+    return json.dumps(summary_data, indent=2)
+
+
+def export_text(summary_data: dict) -> str:
+    return f"""
+NewsNinja Analysis Report
+========================
+
+Generated: {summary_data.get('timestamp', 'N/A')}
+Topics: {', '.join(summary_data.get('topics', []))}
+Sources: {summary_data.get('source_type', 'N/A')}
+
+Summary:
+{summary_data.get('summary', 'N/A')}
+        """
@@ -0,0 +1,167 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config import REPLAY_MODE, REPLAY_PATH, REPLAY_SPEED
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayMissError(LookupError):
+    """A call was made in replay mode that the cassette has no recording for"""
+    pass
+
+
+class Cassette:
+    """
+    JSONL recording of external calls and their latencies.
+
+    In record mode every call made through it is appended to the file; in
+    replay mode calls are answered from the file after sleeping for the
+    recorded latency, so runs are reproducible without network access.
+    """
+
+    def __init__(self, path: str = REPLAY_PATH, mode: str = REPLAY_MODE, speed: float = REPLAY_SPEED):
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"Unknown REPLAY_MODE: {mode}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if mode == "replay":
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry
+            logger.info("Loaded %d recorded calls from %s", len(self._entries), path)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def make_key(kind: str, payload: Any) -> str:
+        encoded = json.dumps([kind, payload], sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def lookup(self, kind: str, payload: Any) -> Dict[str, Any]:
+        entry = self._entries.get(self.make_key(kind, payload))
+        if entry is None:
+            raise ReplayMissError(f"No recorded {kind} call for {str(payload)[:200]}")
+        return entry
+
+    def delay(self, entry: Dict[str, Any]) -> float:
+        return entry["latency_ms"] * self.speed / 1000
+
+    def record(self, kind: str, payload: Any, output: Any, latency_ms: float):
+        entry = {"kind": kind, "key": self.make_key(kind, payload), "latency_ms": round(latency_ms, 1), "output": output}
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+cassette = Cassette()
+
+
+def replayable(kind: str, key: Optional[Callable[..., Any]] = None):
+    """
+    Record or replay a sync or async function's return value.
+
+    key maps the call arguments to the recorded payload; by default all
+    arguments are used.
+    """
+    def payload(args, kwargs):
+        return key(*args, **kwargs) if key else [args, kwargs]
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if cassette.replaying:
+                    entry = cassette.lookup(kind, payload(args, kwargs))
+                    await asyncio.sleep(cassette.delay(entry))
+                    return entry["output"]
+                start = time.perf_counter()
+                result = await fn(*args, **kwargs)
+                if cassette.recording:
+                    cassette.record(kind, payload(args, kwargs), result, (time.perf_counter() - start) * 1000)
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if cassette.replaying:
+                entry = cassette.lookup(kind, payload(args, kwargs))
+                time.sleep(cassette.delay(entry))
+                return entry["output"]
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            if cassette.recording:
+                cassette.record(kind, payload(args, kwargs), result, (time.perf_counter() - start) * 1000)
+            return result
+        return wrapper
+
+    return decorator
+
+
+def _messages_payload(model: str, messages) -> list:
+    return [model, [[message.type, message.content] for message in messages]]
+
+
+def _message_output(message) -> Dict[str, Any]:
+    return {"content": message.content, "usage_metadata": getattr(message, "usage_metadata", None)}
+
+
+class ReplayChatModel:
+    """Chat model wrapper recording or replaying ainvoke/astream calls; there is no blocking invoke"""
+
+    def __init__(self, llm, model: str):
+        self.llm = llm
+        self.model = model
+
+    async def ainvoke(self, messages):
+        payload = _messages_payload(self.model, messages)
+        if cassette.replaying:
+            from langchain_core.messages import AIMessage
+            entry = cassette.lookup("groq", payload)
+            await asyncio.sleep(cassette.delay(entry))
+            return AIMessage(**entry["output"])
+        start = time.perf_counter()
+        response = await self.llm.ainvoke(messages)
+        cassette.record("groq", payload, _message_output(response), (time.perf_counter() - start) * 1000)
+        return response
+
+    async def astream(self, messages):
+        payload = _messages_payload(self.model, messages)
+        if cassette.replaying:
+            from langchain_core.messages import AIMessageChunk
+            entry = cassette.lookup("groq_stream", payload)
+            for recorded in entry["output"]:
+                chunk = dict(recorded)
+                await asyncio.sleep(chunk.pop("delay_ms", 0) * cassette.speed / 1000)
+                yield AIMessageChunk(**chunk)
+            return
+        start = last = time.perf_counter()
+        chunks = []
+        async for chunk in self.llm.astream(messages):
+            now = time.perf_counter()
+            chunks.append({**_message_output(chunk), "delay_ms": round((now - last) * 1000, 1)})
+            last = now
+            yield chunk
+        cassette.record("groq_stream", payload, chunks, (time.perf_counter() - start) * 1000)
+
+
+def wrap_chat_model(llm, model: str):
+    """Route a chat model through the cassette when record/replay is on"""
+    return llm if cassette.mode == "off" else ReplayChatModel(llm, model)
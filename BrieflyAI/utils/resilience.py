@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from prometheus_client import Counter, Gauge
+from config import (
+    HEDGE_PERCENTILE,
+    HEDGE_INITIAL_DELAY,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_WINDOW,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+HEDGES = Counter(
+    "briefly_hedged_requests_total",
+    "Hedged duplicates sent and which request answered first",
+    ["name", "outcome"]
+)
+CIRCUIT_OPEN = Gauge(
+    "briefly_circuit_open",
+    "1 while the circuit breaker is open",
+    ["name"],
+    multiprocess_mode="livemax"
+)
+CIRCUIT_REJECTIONS = Counter(
+    "briefly_circuit_rejections_total",
+    "Calls failed fast by an open circuit breaker",
+    ["name"]
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency that is currently failing"""
+    pass
+
+
+class LatencyTracker:
+    """Recent successful call latencies, used to pick the hedge delay"""
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def hedge_delay(self) -> float:
+        p = self.percentile(HEDGE_PERCENTILE)
+        return HEDGE_INITIAL_DELAY if p is None else max(p, HEDGE_MIN_DELAY)
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a dependency is down.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    raise CircuitOpenError. Once reset_seconds have passed a single trial call
+    is let through; its success closes the circuit, its failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: int = CIRCUIT_RESET_SECONDS
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def _before_call(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_running):
+            CIRCUIT_REJECTIONS.labels(self.name).inc()
+            raise CircuitOpenError(f"{self.name} circuit open after {self.failures} consecutive failures")
+        self._trial_running = state == "half_open"
+
+    def _record_success(self):
+        if self.opened_at is not None:
+            logger.info("Circuit closed", extra={"circuit": self.name})
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        CIRCUIT_OPEN.labels(self.name).set(0)
+
+    def _record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning("Circuit opened", extra={"circuit": self.name, "failures": self.failures})
+            self.opened_at = time.monotonic()
+            CIRCUIT_OPEN.labels(self.name).set(1)
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self._before_call()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self._trial_running = False
+            raise
+        except Exception:
+            self._record_failure()
+            raise
+        self._record_success()
+        return result
+
+
+async def hedged(
+    fn: Callable[[], Awaitable[Any]],
+    delay: float,
+    hedge_fn: Optional[Callable[[], Awaitable[Any]]] = None,
+    name: str = "hedge"
+) -> Any:
+    """
+    Await fn(); if it has not finished after delay seconds, also start
+    hedge_fn() (fn by default) and return whichever succeeds first.
+    The slower call is cancelled.
+    """
+    primary = asyncio.ensure_future(fn())
+    hedge = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge = asyncio.ensure_future((hedge_fn or fn)())
+        HEDGES.labels(name, "sent").inc()
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    HEDGES.labels(name, "hedge_won" if task is hedge else "primary_won").inc()
+                    return task.result()
+        # Both failed; report the original request's error
+        return primary.result()
+    finally:
+        for task in (primary, hedge):
+            if task is not None:
+                task.cancel()
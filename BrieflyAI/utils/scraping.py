@@ -1,10 +1,18 @@
-from urllib.parse import quote_plus
+import logging
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Iterator, List, Optional
+from urllib.parse import quote_plus, urljoin
 from dotenv import load_dotenv
 import requests
 from fastapi import FastAPI, HTTPException
-from bs4 import BeautifulSoup
+from lxml import etree
 from datetime import datetime
-from config import BRIGHTDATA_API_KEY, WEB_UNLOCKER_ZONE
+from config import BRIGHTDATA_API_KEY, WEB_UNLOCKER_ZONE, BRIGHTDATA_API_URL
+from utils.replay import replayable
+
+logger = logging.getLogger(__name__)
+
 class MCPOverloadedError(Exception):
     """Custom exception for MCP service overloads"""
     pass
@@ -32,6 +40,7 @@ def generate_news_urls_to_scrape(list_of_keywords):
     return valid_urls_dict
 
 
+@replayable("brightdata")
 def scrape_with_brightdata(url: str) -> str:
     """Scrape a URL using BrightData with improved error handling"""
     
@@ -63,31 +72,28 @@ def scrape_with_brightdata(url: str) -> str:
     }
     
     try:
-        print(f"Attempting to scrape: {url}")
-        print(f"Using zone: {zone}")
+        logger.debug("Scraping url", extra={"url": url, "zone": zone})
         
         response = requests.post(
-            "https://api.brightdata.com/request", 
+            BRIGHTDATA_API_URL,
             json=payload, 
             headers=headers,
             timeout=30  # Add timeout
         )
         
-        # Log response details for debugging
-        print(f"Response status: {response.status_code}")
-        print(f"Response headers: {dict(response.headers)}")
+        logger.debug("BrightData response", extra={"url": url, "status": response.status_code})
         
         if response.status_code == 400:
             # Try to get more specific error details
             try:
                 error_detail = response.json()
-                print(f"BrightData error details: {error_detail}")
+                logger.warning("BrightData error", extra={"url": url, "detail": error_detail})
                 raise HTTPException(
                     status_code=500, 
                     detail=f"BrightData API error: {error_detail.get('message', 'Bad Request')}"
                 )
             except:
-                print(f"Response text: {response.text}")
+                logger.warning("BrightData error", extra={"url": url, "detail": response.text})
                 raise HTTPException(
                     status_code=500, 
                     detail=f"BrightData API error: 400 Bad Request - {response.text}"
@@ -97,12 +103,15 @@ def scrape_with_brightdata(url: str) -> str:
         return response.text
         
     except requests.exceptions.RequestException as e:
-        print(f"Request exception: {str(e)}")
+        logger.warning("BrightData request failed", extra={"url": url, "error": str(e)})
         raise HTTPException(status_code=500, detail=f"BrightData error: {str(e)}")
 
 
 def clean_html_to_text(html_content: str) -> str:
     """Clean HTML content to plain text"""
+    # Only the fallback path needs BeautifulSoup, so it is not loaded at start-up
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html_content, "html.parser")
     text = soup.get_text(separator="\n")
     return text.strip()
@@ -138,4 +147,111 @@ def extract_headlines(cleaned_text: str) -> str:
     if current_block:
         headlines.append(current_block[0])
     
-    return "\n".join(headlines)
\ No newline at end of file
+    return "\n".join(headlines)
+
+
+GOOGLE_NEWS_BASE_URL = "https://news.google.com/"
+
+# Google News renames its classes from time to time, so each field has fallbacks
+_TITLE_XPATH = etree.XPath(
+    ".//a[contains(@class, 'JtKRv') or contains(@class, 'gPFEn')]"
+    " | .//h3//a | .//h4//a | .//h3 | .//h4"
+)
+_PUBLISHER_XPATH = etree.XPath(
+    ".//*[contains(@class, 'vr1PYe') or contains(@class, 'a7P8l') or @data-n-tid]"
+)
+_TIME_XPATH = etree.XPath(".//time")
+_LINK_XPATH = etree.XPath(".//a[@href]")
+
+
+@dataclass
+class HeadlineRecord:
+    """A single headline parsed from a Google News results page"""
+    title: str
+    publisher: Optional[str] = None
+    published_at: Optional[str] = None
+    url: Optional[str] = None
+    count: int = 1  # How many sources carried this story after deduplication
+
+
+def _element_text(element) -> str:
+    return " ".join("".join(element.itertext()).split())
+
+
+def _parse_article(article) -> Optional[HeadlineRecord]:
+    titles = [text for text in (_element_text(el) for el in _TITLE_XPATH(article)) if text]
+    if not titles:
+        return None
+
+    publishers = [text for text in (_element_text(el) for el in _PUBLISHER_XPATH(article)) if text]
+    times = _TIME_XPATH(article)
+    links = _LINK_XPATH(article)
+
+    published_at = None
+    if times:
+        published_at = times[0].get("datetime") or _element_text(times[0]) or None
+
+    return HeadlineRecord(
+        title=titles[0],
+        publisher=publishers[0] if publishers else None,
+        published_at=published_at,
+        url=urljoin(GOOGLE_NEWS_BASE_URL, links[0].get("href")) if links else None
+    )
+
+
+def iter_headline_records(html_content: str) -> Iterator[HeadlineRecord]:
+    """
+    Stream headline records out of a Google News page.
+
+    Only <article> subtrees are materialized; each is parsed and then freed,
+    so the full document tree and its flattened text are never built.
+    """
+    events = etree.iterparse(
+        BytesIO(html_content.encode("utf-8")),
+        events=("end",),
+        tag="article",
+        html=True,
+        recover=True
+    )
+    seen = set()
+    for _, article in events:
+        # Nested <article> elements are handled as part of their outer article
+        if next(article.iterancestors("article"), None) is not None:
+            continue
+
+        record = _parse_article(article)
+
+        # Free the parsed subtree and any siblings already processed
+        article.clear()
+        parent = article.getparent()
+        while parent is not None and article.getprevious() is not None:
+            del parent[0]
+
+        # Syndicated cards can repeat the same headline verbatim
+        if record is not None and record.title not in seen:
+            seen.add(record.title)
+            yield record
+
+
+def extract_headline_records(html_content: str) -> List[HeadlineRecord]:
+    return list(iter_headline_records(html_content))
+
+
+def format_headlines(records: List[HeadlineRecord]) -> str:
+    """Render records as the newline-separated headline block the prompts expect"""
+    lines = []
+    for record in records:
+        details = ", ".join(part for part in (record.publisher, record.published_at) if part)
+        if record.count > 1:
+            details += f"; reported by {record.count} sources" if details else f"reported by {record.count} sources"
+        lines.append(f"{record.title} ({details})" if details else record.title)
+    return "\n".join(lines)
+
+
+def parse_headline_records(html_content: str) -> List[HeadlineRecord]:
+    """Fast selector-based extraction, falling back to the text heuristic if the markup changed"""
+    records = extract_headline_records(html_content)
+    if records:
+        return records
+    headlines = extract_headlines(clean_html_to_text(html_content))
+    return [HeadlineRecord(title=line) for line in headlines.splitlines() if line.strip()]
@@ -0,0 +1,209 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from aiolimiter import AsyncLimiter
+from config import SHARED_STORE, SHARED_STORE_DB, REDIS_URL
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:
+    redis = None
+    aioredis = None
+
+# Identifies this process as the holder of a lease
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - updated_at) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+if tokens >= 0 then return '0' end
+return tostring(-tokens / rate)
+"""
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """SQLite connection that tolerates other worker processes writing the same file"""
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _require_redis():
+    if redis is None:
+        raise RuntimeError("SHARED_STORE=redis needs the redis package: pip install redis")
+
+
+class SQLiteRateLimiter:
+    """
+    Token bucket kept in a SQLite row so every worker process draws from one quota.
+
+    Each acquire takes a token immediately, letting the bucket go negative,
+    and sleeps until that token would have been refilled. Waiters are served
+    in order with a single write each.
+    """
+
+    def __init__(self, name: str, max_rate: float, time_period: float = 60, path: str = SHARED_STORE_DB):
+        self.name = name
+        self.capacity = max_rate
+        self.rate = max_rate / time_period
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        self._conn.isolation_level = None
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits "
+            "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def _take(self) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM rate_limits WHERE name = ?", (self.name,)
+                ).fetchone()
+                now = time.time()
+                tokens = self.capacity if row is None else min(self.capacity, row[0] + (now - row[1]) * self.rate)
+                tokens -= 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (self.name, tokens, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return max(-tokens / self.rate, 0.0)
+
+    async def acquire(self):
+        wait = await asyncio.to_thread(self._take)
+        if wait:
+            await asyncio.sleep(wait)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+class RedisRateLimiter:
+    """The same token bucket as SQLiteRateLimiter, kept in Redis"""
+
+    def __init__(self, name: str, max_rate: float, time_period: float = 60, url: str = REDIS_URL):
+        _require_redis()
+        self.key = f"rate_limit:{name}"
+        self.capacity = max_rate
+        self.rate = max_rate / time_period
+        self._client = aioredis.from_url(url)
+        self._script = self._client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self):
+        wait = float(await self._script(keys=[self.key], args=[self.rate, self.capacity]))
+        if wait:
+            await asyncio.sleep(wait)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+def make_rate_limiter(name: str, max_rate: float, time_period: float = 60):
+    """Rate limiter for name, shared across worker processes unless SHARED_STORE is memory"""
+    if SHARED_STORE == "redis":
+        return RedisRateLimiter(name, max_rate, time_period)
+    if SHARED_STORE == "sqlite":
+        return SQLiteRateLimiter(name, max_rate, time_period)
+    return AsyncLimiter(max_rate, time_period)
+
+
+class Lease:
+    """
+    Time-limited ownership of a named task, so only one worker process runs it.
+    The holder renews by acquiring again before ttl_seconds pass.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._conn: Optional[sqlite3.Connection] = None
+        self._client = None
+        self._lock = threading.Lock()
+        if SHARED_STORE == "redis":
+            _require_redis()
+            self._client = aioredis.from_url(REDIS_URL)
+        elif SHARED_STORE == "sqlite":
+            self._conn = connect_sqlite(SHARED_STORE_DB)
+            self._conn.isolation_level = None
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases "
+                "(name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _acquire_sqlite(self, ttl_seconds: float) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT holder, expires_at FROM leases WHERE name = ?", (self.name,)
+                ).fetchone()
+                now = time.time()
+                acquired = row is None or row[0] == WORKER_ID or row[1] < now
+                if acquired:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO leases (name, holder, expires_at) VALUES (?, ?, ?)",
+                        (self.name, WORKER_ID, now + ttl_seconds)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return acquired
+
+    async def acquire(self, ttl_seconds: float) -> bool:
+        if self._client is not None:
+            key = f"lease:{self.name}"
+            if await self._client.set(key, WORKER_ID, nx=True, ex=int(ttl_seconds)):
+                return True
+            holder = await self._client.get(key)
+            if holder is not None and holder.decode() == WORKER_ID:
+                await self._client.expire(key, int(ttl_seconds))
+                return True
+            return False
+        if self._conn is not None:
+            return await asyncio.to_thread(self._acquire_sqlite, ttl_seconds)
+        # Single process: nothing to coordinate with
+        return True
+
+
+def worker_alive(worker_id: Optional[str]) -> bool:
+    """Whether the process behind a WORKER_ID may still be running"""
+    if not worker_id:
+        return False
+    host, _, pid = worker_id.rpartition(":")
+    if host != socket.gethostname():
+        # Can't see other hosts' processes; assume they are up
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from prometheus_client import Counter, Histogram
+from config import SINGLEFLIGHT_BUCKET_SECONDS
+
+logger = logging.getLogger(__name__)
+
+COALESCED = Counter(
+    "briefly_singleflight_coalesced_total",
+    "Callers that awaited another caller's in-flight task",
+    ["source"]
+)
+FLIGHT_CALLERS = Histogram(
+    "briefly_singleflight_callers",
+    "Callers sharing one in-flight task",
+    ["source"],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100)
+)
+
+
+class SingleFlight:
+    """
+    Share one in-flight task between concurrent callers asking for the same work.
+
+    Work is keyed by (source, key, time bucket), so identical requests within
+    a bucket await a single task and get its result or its exception. Callers
+    normalize keys themselves. A caller that is cancelled does not cancel the
+    shared task while other callers still wait on it; once every caller has
+    been cancelled the task is cancelled too.
+    """
+
+    def __init__(self, bucket_seconds: int = SINGLEFLIGHT_BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self._inflight: Dict[Tuple[str, str, int], asyncio.Future] = {}
+        self._callers: Dict[Tuple[str, str, int], int] = {}
+        self._abandoned: Dict[Tuple[str, str, int], int] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _key(self, source: str, key: str) -> Tuple[str, str, int]:
+        return source, key, int(time.time() // self.bucket_seconds)
+
+    def in_flight(self, source: str, key: str) -> bool:
+        return self._key(source, key) in self._inflight
+
+    def do(self, source: str, key: str, fn: Callable[[], Awaitable[Any]]) -> Awaitable[Any]:
+        """Join the in-flight task for this key, or start fn() as a new one"""
+        flight_key = self._key(source, key)
+        stats = self.stats.setdefault(source, {"flights": 0, "coalesced": 0, "max_callers": 0})
+
+        flight = self._inflight.get(flight_key)
+        if flight is not None:
+            self._callers[flight_key] += 1
+            stats["coalesced"] += 1
+            stats["max_callers"] = max(stats["max_callers"], self._callers[flight_key])
+            COALESCED.labels(source).inc()
+            return self._waiter(flight_key, flight)
+
+        flight = asyncio.ensure_future(fn())
+        self._inflight[flight_key] = flight
+        self._callers[flight_key] = 1
+        self._abandoned[flight_key] = 0
+        stats["flights"] += 1
+        stats["max_callers"] = max(stats["max_callers"], 1)
+
+        def _done(task: asyncio.Future):
+            self._inflight.pop(flight_key, None)
+            self._abandoned.pop(flight_key, None)
+            FLIGHT_CALLERS.labels(source).observe(self._callers.pop(flight_key, 1))
+            if not task.cancelled() and task.exception() is not None:
+                # Retrieved here so an abandoned flight does not log "exception never retrieved"
+                logger.debug("Shared %s task failed for %s: %s", source, key, task.exception())
+
+        flight.add_done_callback(_done)
+        return self._waiter(flight_key, flight)
+
+    def _waiter(self, flight_key: Tuple[str, str, int], flight: asyncio.Future) -> asyncio.Future:
+        waiter = asyncio.shield(flight)
+
+        def _abandon(waiter: asyncio.Future):
+            if not waiter.cancelled() or flight.done():
+                return
+            self._abandoned[flight_key] += 1
+            if self._abandoned[flight_key] == self._callers[flight_key]:
+                # Nobody is left to use the result
+                flight.cancel()
+
+        waiter.add_done_callback(_abandon)
+        return waiter
+
+
+singleflight = SingleFlight()
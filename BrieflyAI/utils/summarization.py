@@ -1,12 +1,35 @@
-from langchain_groq import ChatGroq
-from langchain_core.messages import SystemMessage, HumanMessage
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Tuple
+
+import httpx
 from fastapi import HTTPException
-from config import GROQ_API_KEY, LLAMA_70b_model, TEMPERATURE, MAX_TOKEN_1, MAX_TOKEN_2
+from config import (
+    GROQ_API_KEY,
+    TEMPERATURE,
+    GROQ_MAX_CONNECTIONS,
+    GROQ_MAX_KEEPALIVE_CONNECTIONS,
+    GROQ_TIMEOUT_SECONDS,
+    MAX_TOKEN_1,
+    MAX_TOKEN_2,
+    MAX_TOKEN_3,
+    SUMMARY_CONTEXT_BUDGET
+)
+from utils.cache import llm_cache
+from utils.prompt_builder import build_topic_blocks
+from utils.tokens import count_tokens
+from utils.metrics import record_token_usage
+from utils.model_policy import MODEL_FALLBACK_CALLS, model_for, fallback_chain
+from utils.replay import wrap_chat_model
+from utils.singleflight import singleflight
+
+if TYPE_CHECKING:
+    from langchain_groq import ChatGroq
 
+# Bump when the prompt templates below change in a way the cache key can't see
+PROMPT_VERSION = "1"
 
-def generate_structured_news_summary(api_key, news_data, reddit_data, topics):
-    """Generate a structured news summary for UI display using GROQ"""
-    system_prompt = """
+STRUCTURED_NEWS_SUMMARY_PROMPT = """
     You are a professional news analyst. Create a well-structured, comprehensive summary for web display.
 
     For each topic, organize the information as follows:
@@ -26,53 +49,7 @@ def generate_structured_news_summary(api_key, news_data, reddit_data, topics):
     Structure each topic clearly with proper headings and organize information logically.
     """
 
-    try:
-        topic_blocks = []
-        for topic in topics:
-            news_content = news_data.get("news_analysis", {}).get(topic, '') if news_data else ''
-            reddit_content = reddit_data.get("reddit_analysis", {}).get(topic, '') if reddit_data else ''
-            
-            context = []
-            if news_content:
-                context.append(f"NEWS SOURCES:\n{news_content}")
-            if reddit_content:
-                context.append(f"REDDIT DISCUSSIONS:\n{reddit_content}")
-            
-            if context:  # Only include topics with actual content
-                topic_blocks.append(
-                    f"TOPIC: {topic}\n\n" +
-                    "\n\n".join(context)
-                )
-
-        user_prompt = (
-            "Create a comprehensive structured summary for these topics using available sources:\n\n" +
-            "\n\n--- NEXT TOPIC ---\n\n".join(topic_blocks) +
-            "\n\nPlease format this as a well-structured report suitable for web display with clear headings, bullet points, and organized sections."
-        )
-
-        llm = ChatGroq(
-            model=LLAMA_70b_model,
-            api_key=api_key,
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKEN_2,
-        )
-
-        response = llm.invoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ])
-
-        return response.content
-
-    except Exception as e:
-        raise e
-
-
-def summarize_with_groq_structured(api_key: str, headlines: str) -> str:
-    """
-    Summarize headlines into a structured format for UI display using GROQ.
-    """
-    system_prompt = """
+HEADLINE_SUMMARY_PROMPT = """
     You are a professional news analyst creating structured summaries for web display.
 
     Transform the provided headlines into a well-organized, comprehensive summary with:
@@ -93,19 +70,247 @@ def summarize_with_groq_structured(api_key: str, headlines: str) -> str:
     Create a structured report that would be suitable for display on a news dashboard or summary page.
     """
 
+HEADLINE_DELTA_PROMPT = """
+    You are a professional news analyst updating an existing news digest.
+
+    The provided headlines are new since the digest was last written. Summarize only them:
+    - Present the key new developments as concise bullet points
+    - Group related headlines into a single bullet
+    - Note when a headline continues or changes an ongoing story
+    - Maintain a neutral, professional tone
+
+    Do not add headings, introductions or conclusions; the bullets are merged into the existing digest.
+    """
+
+REDDIT_POSTS_SUMMARY_PROMPT = """
+    You are a Reddit analysis expert. Summarize the provided Reddit posts and their top comments.
+
+    Provide a comprehensive summary including:
+    - Main discussion points
+    - Key opinions expressed
+    - Any notable trends or patterns
+    - The overall narrative, quoting interesting comments without mentioning names
+    - Overall sentiment (positive/neutral/negative)
+
+    Use only the provided posts; they have already been filtered by date and score.
+    """
+
+
+@lru_cache(maxsize=1)
+def get_http_async_client() -> httpx.AsyncClient:
+    """
+    Connection pool shared by every ChatGroq client. Each client would
+    otherwise open its own, so keep-alive connections to Groq were not reused
+    across models and token limits.
+    """
+    return httpx.AsyncClient(limits=httpx.Limits(
+        max_connections=GROQ_MAX_CONNECTIONS,
+        max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS
+    ))
+
+
+@lru_cache(maxsize=None)
+def get_llm(api_key: str, model: str, max_tokens: int, temperature: float = TEMPERATURE, max_retries: int = 2) -> "ChatGroq":
+    """Return a shared ChatGroq client for this configuration"""
+    # LangChain is imported with the first client rather than with this module
+    from langchain_groq import ChatGroq
+
+    return wrap_chat_model(ChatGroq(
+        model=model,
+        api_key=api_key,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        max_retries=max_retries,
+        request_timeout=GROQ_TIMEOUT_SECONDS,
+        http_async_client=get_http_async_client()
+    ), model)
+
+
+def _routed_llms(api_key: str, stage: str, max_tokens: int) -> List[Tuple[str, "ChatGroq"]]:
+    # Only the last model in the chain waits out 429s with client retries; the others hand over at once
+    chain = fallback_chain(stage)
+    return [
+        (model, get_llm(api_key, model, max_tokens, max_retries=2 if model == chain[-1] else 0))
+        for model in chain
+    ]
+
+
+def _record_fallback(stage: str, model: str, index: int):
+    if index > 0:
+        MODEL_FALLBACK_CALLS.labels(stage, model).inc()
+
+
+async def ainvoke_routed(api_key: str, stage: str, max_tokens: int, messages) -> Tuple[str, object]:
+    """Call the stage's model, moving down its fallback chain on 429s; returns the model used and the response"""
+    from groq import RateLimitError
+
+    llms = _routed_llms(api_key, stage, max_tokens)
+    for index, (model, llm) in enumerate(llms):
+        try:
+            response = await llm.ainvoke(messages)
+        except RateLimitError:
+            if index == len(llms) - 1:
+                raise
+            continue
+        _record_fallback(stage, model, index)
+        record_token_usage(model, response)
+        return model, response
+
+
+async def astream_routed(api_key: str, stage: str, max_tokens: int, messages):
+    """Stream from the stage's model; a 429 arrives before the first chunk, so falling back loses no output"""
+    from groq import RateLimitError
+
+    llms = _routed_llms(api_key, stage, max_tokens)
+    for index, (model, llm) in enumerate(llms):
+        started = False
+        try:
+            async for chunk in llm.astream(messages):
+                if not started:
+                    started = True
+                    _record_fallback(stage, model, index)
+                record_token_usage(model, chunk)
+                yield model, chunk
+            return
+        except RateLimitError:
+            if started or index == len(llms) - 1:
+                raise
+
+
+def _messages(system_prompt: str, user_content: str) -> list:
+    from langchain_core.messages import SystemMessage, HumanMessage
+
+    return [SystemMessage(content=system_prompt), HumanMessage(content=user_content)]
+
+
+def _cache_key(model: str, max_tokens: int, system_prompt: str, user_content: str) -> str:
+    return llm_cache.make_key(model, TEMPERATURE, max_tokens, system_prompt, user_content, PROMPT_VERSION)
+
+
+def _total_tokens(response) -> int:
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("total_tokens", 0)
+
+
+async def acomplete_cached(api_key: str, stage: str, max_tokens: int, system_prompt: str, user_content: str) -> str:
+    """
+    Run a chat completion on the stage's model, serving byte-identical prompts
+    from the LLM cache. Identical prompts already in flight share one
+    completion. Completions served by a fallback model are not cached, so the
+    stage's own model answers once it is no longer rate limited.
+    """
+    primary = model_for(stage)
+    key = _cache_key(primary, max_tokens, system_prompt, user_content)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached["content"]
+
+    async def complete():
+        start = time.perf_counter()
+        model, response = await ainvoke_routed(api_key, stage, max_tokens, _messages(system_prompt, user_content))
+        if model == primary:
+            llm_cache.put(key, response.content, _total_tokens(response), (time.perf_counter() - start) * 1000)
+        return response.content
+
+    if singleflight.in_flight("groq", key):
+        llm_cache.record_coalesced()
+    return await singleflight.do("groq", key, complete)
+
+
+async def astream_cached(api_key: str, stage: str, max_tokens: int, system_prompt: str, user_content: str):
+    """Stream a chat completion token by token, storing the full text in the LLM cache"""
+    primary = model_for(stage)
+    key = _cache_key(primary, max_tokens, system_prompt, user_content)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        yield cached["content"]
+        return
+
+    start = time.perf_counter()
+    parts = []
+    tokens = 0
+    model = primary
+    async for model, chunk in astream_routed(api_key, stage, max_tokens, _messages(system_prompt, user_content)):
+        tokens += _total_tokens(chunk)
+        parts.append(chunk.content)
+        yield chunk.content
+    if model == primary:
+        llm_cache.put(key, "".join(parts), tokens, (time.perf_counter() - start) * 1000)
+
+
+def build_structured_news_prompt(news_data, reddit_data, topics, budget: int = SUMMARY_CONTEXT_BUDGET):
+    """Return the report prompt, fitted to the context budget, and its token accounting"""
+    topic_sources = {}
+    for topic in topics:
+        news_content = news_data.get("news_analysis", {}).get(topic, '') if news_data else ''
+        reddit_content = reddit_data.get("reddit_analysis", {}).get(topic, '') if reddit_data else ''
+
+        sources = {}
+        if news_content:
+            sources["news"] = news_content
+        if reddit_content:
+            sources["reddit"] = reddit_content
+
+        if sources:  # Only include topics with actual content
+            topic_sources[topic] = sources
+
+    topic_blocks, topic_stats = build_topic_blocks(topic_sources, budget)
+    user_prompt = (
+        "Create a comprehensive structured summary for these topics using available sources:\n\n" +
+        "\n\n--- NEXT TOPIC ---\n\n".join(topic_blocks) +
+        "\n\nPlease format this as a well-structured report suitable for web display with clear headings, bullet points, and organized sections."
+    )
+    stats = {
+        "budget": budget,
+        "system_tokens": count_tokens(STRUCTURED_NEWS_SUMMARY_PROMPT),
+        "prompt_tokens": count_tokens(user_prompt),
+        "topics": topic_stats
+    }
+    return user_prompt, stats
+
+
+async def agenerate_structured_news_summary(api_key, news_data, reddit_data, topics, user_prompt=None):
+    """Generate the structured report over all topics for UI display; accepts a prompt already built"""
+    if user_prompt is None:
+        user_prompt, _ = build_structured_news_prompt(news_data, reddit_data, topics)
+    return await acomplete_cached(api_key, "report", MAX_TOKEN_2, STRUCTURED_NEWS_SUMMARY_PROMPT, user_prompt)
+
+
+async def astream_structured_news_summary(api_key, news_data, reddit_data, topics, user_prompt=None):
+    """Streaming variant of agenerate_structured_news_summary"""
+    if user_prompt is None:
+        user_prompt, _ = build_structured_news_prompt(news_data, reddit_data, topics)
+    async for token in astream_cached(api_key, "report", MAX_TOKEN_2, STRUCTURED_NEWS_SUMMARY_PROMPT, user_prompt):
+        yield token
+
+
+async def asummarize_headline_delta(api_key: str, headlines: str) -> str:
+    """Summarize only new headlines as bullets to merge into a topic's previous digest"""
     try:
-        llm = ChatGroq(
-            model=LLAMA_70b_model,
-            api_key=api_key,
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKEN_1
+        return await acomplete_cached(
+            api_key, "headline_delta", MAX_TOKEN_3, HEADLINE_DELTA_PROMPT,
+            f"New headlines:\n\n{headlines}"
         )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"GROQ error: {str(e)}")
 
-        response = llm.invoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"Headlines to analyze:\n\n{headlines}")
-        ])
 
-        return response.content
+async def asummarize_with_groq_structured(api_key: str, headlines: str) -> str:
+    """Summarize headlines into a structured format for UI display"""
+    try:
+        return await acomplete_cached(
+            api_key, "headline_summary", MAX_TOKEN_1, HEADLINE_SUMMARY_PROMPT,
+            f"Headlines to analyze:\n\n{headlines}"
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"GROQ error: {str(e)}")
+
+
+async def asummarize_reddit_posts(api_key: str, topic: str, posts: str) -> Tuple[str, int]:
+    """Summarize filtered Reddit posts in a single call; returns the summary and tokens used"""
+    messages = _messages(REDDIT_POSTS_SUMMARY_PROMPT, f"Reddit posts about '{topic}':\n\n{posts}")
+    try:
+        _, response = await ainvoke_routed(api_key, "reddit_summary", MAX_TOKEN_1, messages)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"GROQ error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"GROQ error: {str(e)}")
+    return response.content, _total_tokens(response)
@@ -0,0 +1,48 @@
+import importlib
+import logging
+import time
+from typing import Callable, Dict
+
+from utils.archive import archive, _arrow
+from utils.summarization import get_http_async_client
+from utils.tokens import _encoding
+
+logger = logging.getLogger(__name__)
+
+# Imported on first use by the modules that need them; listed here so warm_up can load them early
+HEAVY_MODULES = {
+    "groq": ["groq", "langchain_groq", "langchain_core.messages"],
+    "mcp": ["mcp", "mcp.client.stdio", "langchain_mcp_adapters.tools", "langgraph.prebuilt"],
+}
+
+
+def _import(names) -> Callable[[], None]:
+    return lambda: [importlib.import_module(name) for name in names]
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    Load what the first request would otherwise pay for: LangChain and the
+    Groq SDK, MCP and LangGraph, the tokenizer, pyarrow when the archive is
+    on, and the shared Groq connection pool. Blocking; returns seconds per
+    step. A step that fails is logged and left to first use.
+    """
+    steps = {
+        "groq": _import(HEAVY_MODULES["groq"]),
+        "groq_client": get_http_async_client,
+        "mcp": _import(HEAVY_MODULES["mcp"]),
+        "tokenizer": _encoding,
+    }
+    if archive.enabled:
+        steps["pyarrow"] = _arrow
+
+    timings = {}
+    for name, step in steps.items():
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning("Warm-up step failed", extra={"step": name, "error": str(e)})
+        timings[name] = round(time.perf_counter() - start, 3)
+    logger.info("Warm-up finished", extra={"seconds": timings})
+    return timings